@@ -1,20 +1,20 @@
 import os, sys
+import series_cache
+import series_stats
 
 def average(input_file):
-	with open(input_file, 'r') as f:
-		cpu_val = 0.0
-		for total,line in enumerate(f):
-			cpu_val += float(line.strip())
-	cpu_val = cpu_val/total
-	f.close()
-	print str(cpu_val)
+	"""
+	Print the mean of the values (one per line) in @input_file.
+	See series_stats for the other summary statistics (percentiles, maximum, time above a threshold, windows).
+	"""
+	cpu_val = series_stats.summarize(series_cache.load(input_file, float))['mean']
+	print(str(cpu_val))
 
 if __name__ == "__main__":
 	if (len(sys.argv) < 2):
 		print("""
-			Usage: python prepare-cpu-mem.py <input_file> 
+			Usage: python average-cpu.py <input_file> 
 		"""
 		)
 		sys.exit(1)
 	average(sys.argv[1])
-
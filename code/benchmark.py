@@ -0,0 +1,347 @@
+"""Benchmark the parsers and plotters on synthetic inputs of increasing size.
+
+Every input type the scripts read has a deterministic generator (same seed, same file):
+ps logs (`%CPU %MEM` / `PSR %CPU` snapshots), stats-*.csv threshold sweeps, Flink degree part-files,
+detector results-*.txt logs and one-value-per-line ts/edge series. Each benchmark runs in its own process
+and reports its wall time, throughput (input rows per second) and the peak RSS of that process.
+
+Results can be saved as JSON and compared against a previous run to catch regressions, e.g.,
+python benchmark.py --sizes 1000 100000 --save base.json
+python benchmark.py --sizes 1000 100000 --compare base.json --tolerance 0.2
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import traceback
+import importlib.util
+import multiprocessing
+import queue as queue_module
+import numpy as np
+
+CHUNK_ROWS = 1 << 20
+
+
+def _write_lines(filepath, lines):
+    """Write the strings of the iterable @lines to @filepath, a chunk at a time."""
+    with open(filepath, 'w') as f:
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) == CHUNK_ROWS:
+                f.write('\n'.join(chunk) + '\n')
+                chunk = []
+        if chunk:
+            f.write('\n'.join(chunk) + '\n')
+
+
+def gen_ps_log(filepath, rows, num_cores=8, threads=11, seed=0):
+    """A ps log of about @rows lines: snapshots of @threads threads spread over @num_cores cores."""
+    rng = random.Random(seed)
+
+    def lines():
+        for _ in range(max(1, rows // (threads + 3))):
+            yield '%CPU     %MEM    '
+            yield '{:4.1f}  {:3.1f}'.format(rng.uniform(0, 800), rng.uniform(0, 5))
+            yield 'PSR %CPU'
+            for _ in range(threads):
+                yield '  {}  {:3.1f}'.format(rng.randrange(num_cores), rng.uniform(0, 100))
+    _write_lines(filepath, lines())
+
+
+def gen_stats_csv(filepath, rows, seed=0):
+    """A stats CSV of @rows thresholds, with some 'None' rates and many ties."""
+    rng = random.Random(seed)
+
+    def rate():
+        return 'None' if rng.random() < 0.05 else str(rng.choice((0.5, 0.6, 0.75, 0.8, 1.0)))
+
+    _write_lines(filepath, ('{},{},{},{},{},{},{},{},{},{}'.format(
+        rng.choice(('mean', 'max')), 1.0 + 0.1 * (i % 41), 1, 1, 1, 1, rate(), rate(), rate(), rate()) for i in range(rows)))
+
+
+def gen_degree_parts(folder, rows, parts=4, seed=0):
+    """@parts Flink degree part-files of @rows `<node>,<degree>` lines in total, with power-law degrees."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder)
+    for part in range(parts):
+        n = rows // parts + (1 if part < rows % parts else 0)
+        degrees = (rng.pareto(1.5, n) + 1).astype(np.int64)
+        _write_lines(os.path.join(folder, str(part + 1)), ('{},{}'.format(node, d) for node, d in enumerate(degrees.tolist())))
+
+
+def gen_results_log(filepath, rows, seed=0):
+    """A detector log of about @rows lines: progress messages, threshold configurations and graph verdicts."""
+    rng = random.Random(seed)
+
+    def lines():
+        written = 0
+        while written < rows:
+            for model in range(20):
+                yield 'Sketch shape: ({}, 2000)'.format(rng.randrange(100, 200))
+                yield 'Model {} is done!'.format(model)
+            yield 'Trying: mean/max distances with 1.0, 1.1, 1.2 standard deviation(s)...'
+            yield 'Best Configuration: '
+            yield 'Threshold metric: mean'
+            yield 'Number of standard deviations: 1.3'
+            for name in ('Test accuracy', 'Test Precision', 'Test Recall', 'Test F-1 Score'):
+                yield '{}: {}'.format(name, rng.random())
+            yield 'Results: '
+            for graph in range(50):
+                if rng.random() < 0.5:
+                    yield 'This graph: sketch-attack-{}.txt is considered ABNORMAL at {}'.format(graph, rng.randrange(200))
+                else:
+                    yield 'This graph: sketch-benign-{}.txt is considered NORMAL ({}/375).'.format(graph, rng.randrange(50))
+            written += 99
+    _write_lines(filepath, lines())
+
+
+def gen_series(filepath, rows, seed=0, step=6000, start=0):
+    """A monotone-ish one-value-per-line series (like ts-*.txt) with some out-of-order values."""
+    rng = np.random.default_rng(seed)
+    values = start + np.cumsum(rng.exponential(step, rows))
+    values[rng.random(rows) < 0.01] -= step
+    _write_lines(filepath, ('{:.6f}'.format(v) for v in values.tolist()))
+
+
+def _plot_module():
+    import matplotlib
+    matplotlib.use('Agg')
+    import plot
+    return plot
+
+
+def _bench_plot(kind):
+    """A benchmark of plot.@kind on a single series of the input's size."""
+    def setup(tmp, rows):
+        gen_series(os.path.join(tmp, 'series.txt'), rows)
+
+    def run(tmp, rows):
+        plot = _plot_module()
+        y = plot.import_float_data(os.path.join(tmp, 'series.txt'))
+        out = os.path.join(tmp, 'out.pdf')
+        style = dict(tick_interval=max(1, rows // 10), xlabelrotation=45, color_array=['#1f77b4'] * 4, xlabel_str='x', ylabel_str='y', savefilepath=out)
+        lines = dict(linestyle_array=['-'], markerstyle_array=['.'], legend_array=['a'], legend_loc='upper right')
+        x = np.arange(len(y))
+        if kind == 'plot_hist':
+            # bar charts have one bar per value; cap them at a readable number
+            bars = [y[:min(rows, 200)]] * 4
+            plot.plot_hist(bars, style['color_array'], ['a', 'b', 'c', 'd'], [str(i) for i in range(len(bars[0]))], 'x', 'y', out, True)
+        elif kind == 'plot_multilines':
+            plot.plot_multilines([y], need_right_x_lim=False, **dict(style, **lines))
+        elif kind == 'plot_multilines_x':
+            plot.plot_multilines_x([x], [y], **dict(style, **lines))
+        elif kind == 'plot_perf':
+            plot.plot_perf([y], **dict(style, **lines))
+        elif kind == 'plot_scatters':
+            plot.plot_scatters([y], markerstyle_array=['.'], legend_array=['a'], legend_loc='upper right', need_legend=True, **style)
+        elif kind == 'plot_scatters_no_legend':
+            plot.plot_scatters_no_legend([y], markerstyle_array=['.'], **style)
+        elif kind == 'plot_scatters_legend_out':
+            plot.plot_scatters_legend_out([y], markerstyle_array=['.'], legend_array=['a'], legend_loc=1, need_legend=True, **style)
+        elif kind == 'plot_scatters_x':
+            plot.plot_scatters_x([x], [y], markerstyle_array=['.'], legend_array=['a'], legend_loc='upper right', need_legend=True, **style)
+    return setup, run
+
+
+def _load_script(name):
+    """Import a code/ script whose file name is not a valid module name (e.g., prepare-camflow-perf)."""
+    module_name = name.replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(os.path.dirname(os.path.abspath(__file__)), name + '.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    sys.modules[module_name] = module
+    return module
+
+
+def _bench_decompose():
+    def setup(tmp, rows):
+        gen_ps_log(os.path.join(tmp, 'ps.txt'), rows)
+
+    def run(tmp, rows):
+        import ps_log
+        ps_log.decode(os.path.join(tmp, 'ps.txt'))
+    return setup, run
+
+
+def _bench_best_results():
+    def setup(tmp, rows):
+        gen_stats_csv(os.path.join(tmp, 'stats-s-2000-h-3-w-450-i-10000.csv'), rows)
+
+    def run(tmp, rows):
+        import prepare
+        prepare.best_results(os.path.join(tmp, 'stats-s-2000-h-3-w-450-i-10000.csv'))
+    return setup, run
+
+
+def _bench_clean_up():
+    def setup(tmp, rows):
+        gen_series(os.path.join(tmp, 'ts.txt'), rows)
+
+    def run(tmp, rows):
+        _load_script('prepare-camflow-perf').clean_up(os.path.join(tmp, 'ts.txt'), os.path.join(tmp, 'ts-clean.txt'))
+    return setup, run
+
+
+def _bench_read_degrees():
+    def setup(tmp, rows):
+        gen_degree_parts(os.path.join(tmp, 'degrees'), rows)
+
+    def run(tmp, rows):
+        import plot_degree_dist
+        plot_degree_dist.read_degrees(os.path.join(tmp, 'degrees'))
+    return setup, run
+
+
+def _bench_scan_results():
+    def setup(tmp, rows):
+        gen_results_log(os.path.join(tmp, 'results.txt'), rows)
+
+    def run(tmp, rows):
+        import results_log
+        results_log.scan_files([os.path.join(tmp, 'results.txt')])
+    return setup, run
+
+
+def _bench_import_float_data():
+    def setup(tmp, rows):
+        gen_series(os.path.join(tmp, 'series.txt'), rows)
+
+    def run(tmp, rows):
+        plot = _plot_module()
+        plot.import_float_data(os.path.join(tmp, 'series.txt'))
+    return setup, run
+
+
+BENCHMARKS = dict(
+    decompose=_bench_decompose,
+    best_results=_bench_best_results,
+    clean_up=_bench_clean_up,
+    read_degrees=_bench_read_degrees,
+    scan_results=_bench_scan_results,
+    import_float_data=_bench_import_float_data,
+)
+for _kind in ('plot_multilines', 'plot_multilines_x', 'plot_scatters', 'plot_scatters_no_legend',
+              'plot_scatters_legend_out', 'plot_scatters_x', 'plot_hist', 'plot_perf'):
+    BENCHMARKS[_kind] = (lambda kind: lambda: _bench_plot(kind))(_kind)
+
+
+def _warm_up():
+    # import everything up front, so that import time (about a second for matplotlib) is not measured
+    _plot_module()
+    _load_script('prepare-camflow-perf')
+    import ps_log, prepare, plot_degree_dist, results_log
+
+
+def _child(name, tmp, rows, queue):
+    try:
+        _, run = BENCHMARKS[name]()
+        _warm_up()
+        wall = time.time()
+        cpu = time.process_time()
+        run(tmp, rows)
+        wall = time.time() - wall
+        cpu = time.process_time() - cpu
+    except BaseException:
+        # the parent waits for a result: send it the error instead
+        queue.put(('error', traceback.format_exc()))
+        return
+    # ru_maxrss is in KB on Linux; workers of a process pool count as children
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    queue.put(('ok', (wall, cpu, rss * 1024)))
+
+
+def _wait(proc, queue, poll=1.0):
+    # the result of the child @proc, polling @queue so that a child that dies without one (e.g., killed when out
+    # of memory) does not leave us waiting forever
+    while True:
+        try:
+            return queue.get(timeout=poll)
+        except queue_module.Empty:
+            if not proc.is_alive():
+                # the child may have put its result just before exiting
+                try:
+                    return queue.get(timeout=poll)
+                except queue_module.Empty:
+                    return 'error', 'the benchmark process died with exit code {}'.format(proc.exitcode)
+
+
+def run_benchmark(name, rows):
+    """
+    Generate the input of the benchmark @name with @rows rows, run it in a fresh process and measure it.
+
+    :return: a dict of the rows, wall and CPU time (seconds), throughput (rows/second) and peak RSS (bytes)
+    :raise RuntimeError: if the benchmark failed or its process died, with the error of the process
+    """
+    setup, _ = BENCHMARKS[name]()
+    tmp = tempfile.mkdtemp(prefix='unicorn-bench-')
+    try:
+        setup(tmp, rows)
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_child, args=(name, tmp, rows, queue))
+        proc.start()
+        status, result = _wait(proc, queue)
+        proc.join()
+    finally:
+        shutil.rmtree(tmp)
+    if status == 'error':
+        raise RuntimeError("benchmark {} at {} rows failed:\n{}".format(name, rows, result))
+    wall, cpu, rss = result
+    return dict(rows=rows, wall=wall, cpu=cpu, throughput=rows / wall if wall > 0 else float('inf'), peak_rss=rss)
+
+
+def regressions(results, baseline, tolerance):
+    """The (name, rows, baseline wall time, wall time) of the @results that are more than @tolerance (a fraction) slower than @baseline."""
+    slower = []
+    for name, runs in results.items():
+        base = dict((run['rows'], run) for run in baseline.get(name, []))
+        for run in runs:
+            if run['rows'] in base and run['wall'] > base[run['rows']]['wall'] * (1 + tolerance):
+                slower.append((name, run['rows'], base[run['rows']]['wall'], run['wall']))
+    return slower
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark the parsers and plotters on synthetic inputs.')
+    parser.add_argument('benchmarks', help='benchmarks to run (default: all): ' + ', '.join(sorted(BENCHMARKS)), nargs='*')
+    parser.add_argument('-n', '--sizes', help='input sizes in rows (up to 10^8)', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--save', help='save the results to this JSON file')
+    parser.add_argument('--compare', help='compare with the results saved in this JSON file and exit with 1 on regressions')
+    parser.add_argument('--tolerance', help='allowed slowdown w.r.t. --compare, as a fraction', type=float, default=0.25)
+    args = parser.parse_args()
+
+    names = args.benchmarks or sorted(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error('unknown benchmark(s): ' + ', '.join(unknown))
+
+    results = dict()
+    print('{:<26} {:>11} {:>10} {:>10} {:>14} {:>10}'.format('benchmark', 'rows', 'wall (s)', 'cpu (s)', 'rows/s', 'peak MB'))
+    for name in names:
+        results[name] = []
+        for rows in args.sizes:
+            result = run_benchmark(name, rows)
+            results[name].append(result)
+            print('{:<26} {:>11} {:>10.3f} {:>10.3f} {:>14.0f} {:>10.1f}'.format(
+                name, rows, result['wall'], result['cpu'], result['throughput'], result['peak_rss'] / 1e6))
+            sys.stdout.flush()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            slower = regressions(results, json.load(f), args.tolerance)
+        for name, rows, before, after in slower:
+            print('REGRESSION {} at {} rows: {:.3f}s -> {:.3f}s'.format(name, rows, before, after))
+        if slower:
+            sys.exit(1)
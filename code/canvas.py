@@ -0,0 +1,120 @@
+"""Create, reuse and tear down the figures the plotting functions draw on.
+
+Figures made with pyplot stay registered in its global state until they are closed, so a batch of plots keeps
+every earlier figure (and all of its artists) alive. The plotting functions instead get their figures from a
+RenderContext: plain matplotlib Figures attached to an Agg canvas, never registered with pyplot. Once a figure is
+saved it is cleared and handed out again for the next plot, so a batch of any size holds at most one figure per
+plot in progress. The context also records the peak memory of the process (and optionally of Python objects,
+with tracemalloc) after each saved figure, e.g.,
+
+with canvas.RenderContext(trace=True) as ctx:
+    plot.plot_scatters(...)
+    plot.plot_hist(...)
+print(ctx.figures, ctx.peak_rss, ctx.peak_traced)
+
+Outside a `with` block, the plotting functions use a module-wide default context.
+matplotlib is only imported when the first figure is made, so modules that plot can be imported cheaply.
+"""
+import resource
+import tracemalloc
+import profiling
+
+
+def peak_rss():
+    """The peak resident set size of this process so far, in bytes."""
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RenderContext(object):
+    """
+    Hands out Agg figures and recycles them once saved.
+
+    :param reuse: clear and reuse saved figures; if False, saved figures are dropped (and garbage collected)
+    :param trace: also track the peak memory allocated by Python objects with tracemalloc (slows plotting down)
+    """
+
+    def __init__(self, reuse=True, trace=False):
+        self.reuse = reuse
+        self.trace = trace
+        self._free = []
+        self.figures = 0
+        self.peak_rss = 0
+        self.peak_traced = None
+        self._started_tracing = False
+
+    def subplots(self, figsize=None):
+        """
+        A figure of @figsize inches (matplotlib's default size if None) with a single axes, like plt.subplots().
+
+        :return: the figure and its axes
+        """
+        import matplotlib
+        if self._free:
+            fig = self._free.pop()
+            # a previous plot may have moved the subplot (e.g., tight_layout), so start from the defaults again
+            fig.subplots_adjust(**dict((name, matplotlib.rcParams['figure.subplot.' + name])
+                                       for name in ('left', 'bottom', 'right', 'top', 'wspace', 'hspace')))
+            fig.set_size_inches(figsize or matplotlib.rcParams['figure.figsize'])
+        else:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+        return fig, fig.add_subplot()
+
+    def save(self, fig, savefilepath, **kwargs):
+        """Save @fig to @savefilepath (see Figure.savefig for @kwargs) and release it."""
+        # with bbox_inches='tight', savefig draws the figure twice: once to measure it, once to save it
+        with profiling.stage('save', savefilepath):
+            fig.savefig(savefilepath, **kwargs)
+        self.figures += 1
+        self.release(fig)
+
+    def release(self, fig):
+        """Give back @fig, which must not be used any more."""
+        fig.clear()
+        if self.reuse:
+            self._free.append(fig)
+        self.peak_rss = max(self.peak_rss, peak_rss())
+        if self.trace and tracemalloc.is_tracing():
+            self.peak_traced = max(self.peak_traced or 0, tracemalloc.get_traced_memory()[1])
+
+    def close(self):
+        """Drop all figures kept for reuse."""
+        del self._free[:]
+
+    def __enter__(self):
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        _contexts.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _contexts.remove(self)
+        self.close()
+        if self._started_tracing:
+            self.peak_traced = max(self.peak_traced or 0, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+
+_default = RenderContext()
+_contexts = []
+
+
+def current():
+    """The innermost active RenderContext, or the default one."""
+    return _contexts[-1] if _contexts else _default
+
+
+def subplots(figsize=None):
+    """A figure with a single axes from the current context (see RenderContext.subplots)."""
+    return current().subplots(figsize)
+
+
+def save(fig, savefilepath, **kwargs):
+    """Save @fig to @savefilepath and release it to the current context (see RenderContext.save)."""
+    current().save(fig, savefilepath, **kwargs)
@@ -0,0 +1,188 @@
+"""Merge the CPU and memory usage of Unicorn running on several hosts into cluster-wide series.
+
+Each host has its own ps log (see ps_log), or the CPU and memory series already decoded from it (e.g., by
+prepare-cpu-mem.py, whose CPU series lags by one snapshot and is realigned), with one snapshot every @interval
+seconds from the time the host started recording. The
+per-host streams are merged on time with a heap (k-way merge), so the logs are read side by side, one snapshot at a
+time: memory does not grow with the length of the logs, only with the number of hosts. The merged stream is cut
+into ticks of @step seconds; a host keeps its last reading until its next one (or until its log ends). For each
+tick we get:
+- the CPU usage of each host (averaged over its cores, in %) and of the cluster (averaged over all the cores of the
+hosts running at that time) and of the busiest host;
+- the memory usage of each host (in MB), of the whole cluster (summed over the hosts) and of the largest host.
+The series are written one value per line, like those of prepare-cpu-mem.py, and the CPU usage of the cluster and
+of each host can be drawn with plot_scatters_legend_out, hosts taking the place of the vCPUs of perf_per_cpu.
+"""
+import os
+import math
+import heapq
+import argparse
+import datafile
+import ps_log
+
+COLORS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#cb416b", "#380282", "#01153e")
+MARKERS = (".", "|", "x", "*", "8", "s", "p", "P", "1")
+
+
+def log_samples(filepath, host, num_cores=8, mem_total=61 * 1024, interval=1.0, start=0.0):
+    """
+    Stream the ps log @filepath of @host (an index), recorded on a machine of @num_cores cores and @mem_total MB.
+
+    :return: a generator of (time, host, CPU usage averaged over the cores in %, memory usage in MB)
+    """
+    for k, (_, mem, usage) in enumerate(ps_log.stream(filepath, num_cores)):
+        yield start + k * interval, host, sum(usage) / num_cores, mem * mem_total * 0.01
+
+
+def series_samples(cpu_filepath, mem_filepath, host, interval=1.0, start=0.0, lagged=True):
+    """
+    Stream the decoded CPU (in %) and memory (in MB) series of @host, one value per line (see log_samples).
+    The samples stop at the end of the shorter series.
+
+    :param lagged: the CPU series is lagged by one snapshot (see ps_log.lagged), as prepare-cpu-mem*.py write it:
+    its first value is dropped, so that each CPU value is paired with the memory of its own snapshot, as in
+    log_samples (the last snapshot, which a lagged series misses, is left out)
+    """
+    with datafile.open_input(cpu_filepath) as cpu, datafile.open_input(mem_filepath) as mem:
+        cpu_values = (line for line in cpu if line.strip())
+        if lagged:
+            next(cpu_values, None)
+        values = zip(cpu_values, (line for line in mem if line.strip()))
+        for k, (cpu_value, mem_value) in enumerate(values):
+            yield start + k * interval, host, float(cpu_value), float(mem_value)
+
+
+def _until_end(samples, host, interval):
+    # a host is gone one interval after its last sample
+    last = None
+    for sample in samples:
+        last = sample[0]
+        yield sample
+    if last is not None:
+        yield last + interval, host, None, None
+
+
+def merge(streams, interval=1.0, step=1.0):
+    """
+    Merge the per-host @streams (see log_samples and series_samples, host i being the i-th stream) on time.
+
+    :param interval: the sampling interval of the hosts in seconds
+    :param step: the length of a tick in seconds
+    :return: a generator of (time of the tick, CPU usage of each host, memory usage of each host), where a host
+    is None before its first sample and after its last one
+    """
+    cpu = [None] * len(streams)
+    mem = [None] * len(streams)
+    merged = heapq.merge(*[_until_end(samples, host, interval) for host, samples in enumerate(streams)],
+                         key=lambda sample: (sample[0], sample[1]))
+    current = None
+    for time, host, cpu_value, mem_value in merged:
+        tick = int(math.floor(time / step + 1e-9))
+        if current is None:
+            current = tick
+        # emit every tick that ended before this sample, with the last reading of each host
+        while current < tick:
+            yield current * step, list(cpu), list(mem)
+            current += 1
+        cpu[host] = cpu_value
+        mem[host] = mem_value
+    if current is not None and any(value is not None for value in cpu):
+        yield current * step, list(cpu), list(mem)
+
+
+def aggregate(cpu, mem, cores):
+    """
+    The cluster-wide usage of one tick (see merge) of hosts of @cores cores each.
+
+    :return: the CPU usage of the cluster (over the cores of the running hosts) and of the busiest host (in %),
+    and the memory usage of the cluster and of the largest host (in MB); NaN if no host is running
+    """
+    running = [host for host, value in enumerate(cpu) if value is not None]
+    if not running:
+        return float('nan'), float('nan'), float('nan'), float('nan')
+    total_cores = sum(cores[host] for host in running)
+    return (sum(cpu[host] * cores[host] for host in running) / total_cores, max(cpu[host] for host in running),
+            sum(mem[host] for host in running), max(mem[host] for host in running))
+
+
+def write_cluster(ticks, prefix, names, cores):
+    """
+    Write the series of the merged @ticks (see merge) of the hosts @names with @cores cores each, one value per line:
+    `<prefix>cpu-cluster.txt`, `<prefix>cpu-max.txt`, `<prefix>cpu-<name>.txt` for each host, and the same for `mem`.
+    A host that is not running is written as nan.
+
+    :return: a dict that maps 'cluster', 'max' and each host name to its (CPU file path, memory file path)
+    """
+    paths = dict((name, ('{}cpu-{}.txt'.format(prefix, name), '{}mem-{}.txt'.format(prefix, name)))
+                 for name in ['cluster', 'max'] + list(names))
+    files = dict((name, (open(cpu_fp, 'w'), open(mem_fp, 'w'))) for name, (cpu_fp, mem_fp) in paths.items())
+    nan = float('nan')
+    try:
+        for _, cpu, mem in ticks:
+            cluster_cpu, max_cpu, cluster_mem, max_mem = aggregate(cpu, mem, cores)
+            rows = [('cluster', cluster_cpu, cluster_mem), ('max', max_cpu, max_mem)]
+            rows += [(name, nan if cpu[host] is None else cpu[host], nan if mem[host] is None else mem[host])
+                     for host, name in enumerate(names)]
+            for name, cpu_value, mem_value in rows:
+                files[name][0].write(str(float(cpu_value)) + '\n')
+                files[name][1].write(str(float(mem_value)) + '\n')
+    finally:
+        for cpu_file, mem_file in files.values():
+            cpu_file.close()
+            mem_file.close()
+    return paths
+
+
+def plot_hosts(paths, names, savefilepath, tick_interval=25):
+    """Draw the CPU usage of the cluster and of each host written by write_cluster (@paths), like perf_per_cpu."""
+    import plot
+    data_arrays = [plot.import_float_data(paths[name][0]) for name in ['cluster'] + list(names)]
+    plot.plot_scatters_legend_out(data_arrays, tick_interval, 45, [COLORS[pos % len(COLORS)] for pos in range(len(data_arrays))],
+                                  [MARKERS[pos % len(MARKERS)] for pos in range(len(data_arrays))], ['Cluster average'] + list(names),
+                                  min(len(data_arrays), len(COLORS)), 'Time (seconds)', '% CPU Utilization', savefilepath, True, True)
+
+
+def _per_host(values, n, name):
+    if len(values) == 1:
+        return values * n
+    if len(values) != n:
+        raise SystemExit("give one {} or one per host ({} hosts)".format(name, n))
+    return values
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Merge the CPU and memory usage of several hosts into cluster-wide series.')
+    parser.add_argument('-i', '--input', help='ps log file path of each host', nargs='+')
+    parser.add_argument('--cpu', help='decoded CPU series file path of each host (instead of ps logs)', nargs='+')
+    parser.add_argument('--mem', help='decoded memory series file path of each host (in the order of --cpu)', nargs='+')
+    parser.add_argument('--unlagged', help='the --cpu series are not lagged by one snapshot like those of prepare-cpu-mem*.py (e.g., they were written by this script)', action='store_true')
+    parser.add_argument('-n', '--names', help='host names (default: host-0, host-1, ...)', nargs='+')
+    parser.add_argument('-c', '--cores', help='number of cores of the hosts (one, or one per host)', type=int, nargs='+', default=[8])
+    parser.add_argument('-m', '--mem-total', help='total memory of the hosts in MB (one, or one per host)', type=float, nargs='+', default=[61 * 1024])
+    parser.add_argument('-s', '--start', help='time each host started recording, in seconds (one, or one per host)', type=float, nargs='+', default=[0.0])
+    parser.add_argument('--interval', help='sampling interval of the hosts in seconds', type=float, default=1.0)
+    parser.add_argument('--step', help='length of a tick of the merged series in seconds', type=float, default=1.0)
+    parser.add_argument('-o', '--output', help='output file path prefix, e.g., ../data/cluster/', required=True)
+    parser.add_argument('-p', '--plot', help='file path to save the plot of the CPU usage of the cluster and of each host')
+    args = parser.parse_args()
+
+    if bool(args.input) == bool(args.cpu) or bool(args.cpu) != bool(args.mem) or (args.cpu and len(args.cpu) != len(args.mem)):
+        parser.error('give either ps logs (-i) or as many decoded CPU and memory series (--cpu and --mem)')
+    n = len(args.input or args.cpu)
+    names = args.names or ['host-{}'.format(host) for host in range(n)]
+    if len(names) != n:
+        parser.error('give one name per host')
+    cores = _per_host(args.cores, n, 'core count')
+    starts = _per_host(args.start, n, 'start time')
+    if args.input:
+        mem_totals = _per_host(args.mem_total, n, 'memory size')
+        streams = [log_samples(fp, host, cores[host], mem_totals[host], args.interval, starts[host]) for host, fp in enumerate(args.input)]
+    else:
+        streams = [series_samples(cpu_fp, mem_fp, host, args.interval, starts[host], not args.unlagged)
+                   for host, (cpu_fp, mem_fp) in enumerate(zip(args.cpu, args.mem))]
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    paths = write_cluster(merge(streams, args.interval, args.step), args.output, names, cores)
+    if args.plot:
+        plot_hosts(paths, names, args.plot)
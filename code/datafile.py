@@ -0,0 +1,150 @@
+"""Open data files whether they are compressed or not.
+
+Archived captures are often gzip-, xz-, bzip2- or zstd-compressed. open_input recognizes the compression from
+the first bytes of the file (not from its name) and returns a file object of the decompressed content, so every
+reader works on compressed files directly, without a separate decompression pass or a copy on disk.
+Decompression is streamed: by default a background thread decompresses the next blocks while the caller parses
+the current one (the codecs release the GIL, so both really run at the same time).
+
+zstd support needs the `zstandard` package; the other codecs come with Python.
+"""
+import io
+import queue
+import threading
+
+BLOCK_SIZE = 1 << 20
+# number of decompressed blocks the background thread may run ahead of the reader
+READ_AHEAD = 4
+
+MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'BZh', 'bzip2'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+
+
+def detect(filepath):
+    """The compression of @filepath ('gzip', 'xz', 'bzip2' or 'zstd'), or None if it is not compressed."""
+    with open(filepath, 'rb') as f:
+        head = f.read(6)
+    for magic, codec in MAGIC:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+# the codecs are imported on first use, so that reading uncompressed files costs no extra start-up time
+def _open_gzip(filepath):
+    import gzip
+    return gzip.open(filepath, 'rb')
+
+
+def _open_xz(filepath):
+    import lzma
+    return lzma.open(filepath, 'rb')
+
+
+def _open_bzip2(filepath):
+    import bz2
+    return bz2.open(filepath, 'rb')
+
+
+def _open_zstd(filepath):
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("{} is zstd-compressed; install the zstandard package to read it".format(filepath))
+    return zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), closefd=True)
+
+
+OPENERS = dict(
+    gzip=_open_gzip,
+    xz=_open_xz,
+    bzip2=_open_bzip2,
+    zstd=_open_zstd,
+)
+
+
+class ReadAheadReader(io.RawIOBase):
+    """
+    A raw binary stream of the content of the binary file object @source, read by a background thread
+    @read_ahead blocks of @block_size bytes ahead of the consumer. @source is closed with the reader.
+    """
+
+    def __init__(self, source, block_size=BLOCK_SIZE, read_ahead=READ_AHEAD):
+        super(ReadAheadReader, self).__init__()
+        self._source = source
+        self._block_size = block_size
+        self._blocks = queue.Queue(maxsize=read_ahead)
+        self._stop = threading.Event()
+        self._pending = memoryview(b'')
+        self._done = False
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        try:
+            while not self._stop.is_set():
+                block = self._source.read(self._block_size)
+                self._put(block)
+                if not block:
+                    return
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        # give up if the consumer has stopped reading (and so may never make room in the queue)
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._done:
+            block = self._blocks.get()
+            if isinstance(block, Exception):
+                self._done = True
+                raise block
+            if not block:
+                self._done = True
+            self._pending = memoryview(block)
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._source.close()
+        super(ReadAheadReader, self).close()
+
+
+def open_input(filepath, mode='r', threaded=True, encoding=None, buffering=-1):
+    """
+    Open @filepath for reading, decompressing it on the fly if it is compressed (see detect).
+
+    :param mode: 'r' for text or 'rb' for bytes
+    :param threaded: decompress in a background thread, ahead of the reads
+    :param encoding: the text encoding (in text mode), as for open()
+    :param buffering: the buffer size of uncompressed files, as for open()
+    :return: a file object of the (decompressed) content
+    """
+    if mode not in ('r', 'rb'):
+        raise ValueError("invalid mode for an input file: {}".format(mode))
+    codec = detect(filepath)
+    if codec is None:
+        return open(filepath, mode, buffering=buffering, encoding=encoding)
+    stream = OPENERS[codec](filepath)
+    if threaded:
+        stream = io.BufferedReader(ReadAheadReader(stream), buffer_size=BLOCK_SIZE)
+    if mode == 'rb':
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding)
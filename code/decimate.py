@@ -0,0 +1,105 @@
+"""Reduce long series to a point budget before plotting.
+
+Hour-long (or longer) CPU and memory captures have far more samples than a figure has pixels. Drawing every
+sample as a vector marker makes large PDFs that render slowly. These functions keep what is visible:
+- minmax: the smallest and largest sample of each bucket, so peaks survive;
+- lttb: Largest-Triangle-Three-Buckets, which keeps the samples that best preserve the shape of the curve;
+- percentile_bands: the (e.g., 5th, 50th, 95th) percentiles of each bucket, to be drawn as a band;
+- envelope: the lowest lower bound and highest upper bound of each bucket of a band (e.g., a confidence interval).
+"""
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+
+
+def _buckets(values, num_buckets):
+    """Reshape @values into rows of consecutive samples (at most @num_buckets of them), padding the last row with NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    size = -(-len(values) // num_buckets)
+    rows = -(-len(values) // size)
+    padded = np.full(rows * size, np.nan)
+    padded[:len(values)] = values
+    return padded.reshape(rows, size), size
+
+
+def minmax(x, y, max_points):
+    """
+    Keep the minimum and maximum of @y in each of @max_points / 2 buckets of consecutive samples, in their original order.
+    Buckets with only NaN samples (gaps in the series) are dropped.
+
+    :return: the decimated x and y arrays
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    rows, size = _buckets(y, max(1, max_points // 2))
+    offsets = np.arange(len(rows)) * size
+    # nanargmin and nanargmax raise on an all-NaN row
+    filled = ~np.isnan(rows).all(axis=1)
+    rows, offsets = rows[filled], offsets[filled]
+    keep = np.unique(np.concatenate((offsets + np.nanargmin(rows, axis=1), offsets + np.nanargmax(rows, axis=1))))
+    return x[keep], y[keep]
+
+
+def lttb(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets downsampling of (@x, @y) to @max_points points (at least 3).
+    The first and last points are always kept.
+
+    :return: the decimated x and y arrays
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return x, y
+    # bucket boundaries of the n - 2 inner points
+    bounds = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    prev = 0
+    for b in range(max_points - 2):
+        start, end = bounds[b], bounds[b + 1]
+        # the average point of the next bucket (or the last point)
+        next_start, next_end = end, bounds[b + 2] if b + 2 < len(bounds) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        areas = np.abs((x[prev] - avg_x) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(areas))
+        keep[b + 1] = prev
+    return x[keep], y[keep]
+
+
+def decimate(x, y, max_points, method='minmax'):
+    """Reduce (@x, @y) to about @max_points points with @method ('minmax' or 'lttb')."""
+    if method == 'minmax':
+        return minmax(x, y, max_points)
+    if method == 'lttb':
+        return lttb(x, y, max_points)
+    raise ValueError("unknown decimation method: {}".format(method))
+
+
+def percentile_bands(x, y, num_buckets, percentiles=(5, 50, 95)):
+    """
+    The @percentiles of @y in each of @num_buckets buckets of consecutive samples.
+
+    :return: the mean x of each bucket and one array per percentile
+    """
+    x_rows, _ = _buckets(x, num_buckets)
+    y_rows, _ = _buckets(y, num_buckets)
+    bands = np.nanpercentile(y_rows, percentiles, axis=1)
+    return (np.nanmean(x_rows, axis=1),) + tuple(bands)
+
+
+def envelope(x, low, high, num_buckets):
+    """
+    Reduce the band (@low, @high) over @x to @num_buckets buckets of consecutive samples, keeping its outer edges.
+
+    :return: the mean x, the minimum of @low and the maximum of @high of each bucket
+    """
+    x_rows, _ = _buckets(x, num_buckets)
+    low_rows, _ = _buckets(low, num_buckets)
+    high_rows, _ = _buckets(high, num_buckets)
+    return np.nanmean(x_rows, axis=1), np.nanmin(low_rows, axis=1), np.nanmax(high_rows, axis=1)
@@ -0,0 +1,117 @@
+"""Watch Unicorn's CPU and memory usage live while a detection run is in progress.
+
+The ps log of the run is followed (see ps_log.Follower): every tick only the newly appended bytes are
+decoded, the last @window snapshots are kept, and the figure is updated by blitting the lines over a saved
+background instead of redrawing it. The cost of a tick therefore does not grow with the size of the log.
+Without a display, the figure is written to an image file (e.g., a PNG served by a dashboard) on every tick.
+"""
+import time
+import argparse
+from collections import deque
+import numpy as np
+import matplotlib
+import matplotlib.image
+import ps_log
+
+
+class LivePlot(object):
+    """
+    A two-panel figure (CPU on top, memory below) of the last @window snapshots, updated by blitting.
+
+    :param window: the number of snapshots shown
+    :param mem_total: the total memory of the machine in MB (the upper limit of the memory panel)
+    :param image: if given, the file path the figure is written to after each update
+    """
+
+    def __init__(self, window, mem_total, image=None):
+        import matplotlib.pyplot as plt
+        self.image = image
+        self.x = np.arange(1 - window, 1)
+        self.average = deque(maxlen=window)
+        self.highest = deque(maxlen=window)
+        self.mem = deque(maxlen=window)
+
+        self.fig, (ax_cpu, ax_mem) = plt.subplots(2, 1, sharex=True)
+        self.lines = [
+            ax_cpu.plot([], [], color='#1f77b4', label='Average CPU', animated=True)[0],
+            ax_cpu.plot([], [], color='#ff7f0e', label='Busiest vCPU', animated=True)[0],
+            ax_mem.plot([], [], color='#2ca02c', animated=True)[0],
+        ]
+        # fixed limits, so that the background never changes
+        ax_cpu.set_xlim(left=self.x[0], right=0)
+        ax_cpu.set_ylim(bottom=0, top=100)
+        ax_mem.set_ylim(bottom=0, top=mem_total)
+        ax_cpu.legend(loc='upper left', shadow=False)
+        ax_cpu.set_ylabel('% CPU Utilization')
+        ax_mem.set_ylabel('Memory Utilization (MB)')
+        ax_mem.set_xlabel('Time (seconds, relative to now)')
+
+        self.background = None
+        self.fig.canvas.mpl_connect('draw_event', self._save_background)
+        if image is None:
+            plt.show(block=False)
+        self.fig.canvas.draw()
+
+    def _save_background(self, event):
+        # called after every full draw (the first one, or e.g. a resize of the window)
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for line in self.lines:
+            line.axes.draw_artist(line)
+
+    def update(self, average, highest, mem):
+        """Append the new snapshots' @average and @highest CPU usage and @mem usage, and refresh the figure."""
+        self.average.extend(average)
+        self.highest.extend(highest)
+        self.mem.extend(mem)
+        x = self.x[len(self.x) - len(self.average):]
+        for line, values in zip(self.lines, (self.average, self.highest, self.mem)):
+            line.set_data(x, np.fromiter(values, dtype=float, count=len(values)))
+
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+        self._draw_lines()
+        if self.image is None:
+            canvas.blit(self.fig.bbox)
+            canvas.flush_events()
+        else:
+            # the Agg buffer already holds the updated figure, so no redraw is needed to save it
+            matplotlib.image.imsave(self.image, np.asarray(canvas.buffer_rgba()))
+
+
+def follow(filepath, num_cores=8, mem_total=61 * 1024, window=600, interval=1.0, image=None):
+    """
+    Follow the ps log @filepath and plot the last @window snapshots, refreshing every @interval seconds until interrupted.
+    See ps_log.decode for @num_cores and ps_log.Snapshots.mem_mb for @mem_total.
+    """
+    follower = ps_log.Follower(filepath, num_cores)
+    plot = LivePlot(window, mem_total, image)
+    while True:
+        # only the last @window new snapshots can be shown; the plot keeps the window of those shown so far
+        new = follower.poll()[-window:]
+        if new:
+            plot.update([sum(usage) / num_cores for _, _, usage in new],
+                        [max(usage) for _, _, usage in new],
+                        [mem * mem_total * 0.01 for _, mem, _ in new])
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Plot Unicorn's CPU and memory usage live from a growing ps log.")
+    parser.add_argument('-i', '--input', help='ps log file path', required=True)
+    parser.add_argument('-c', '--cores', help='number of cores of the machine', type=int, default=8)
+    parser.add_argument('-m', '--mem-total', help='total memory of the machine in MB', type=float, default=61 * 1024)
+    parser.add_argument('-w', '--window', help='number of snapshots shown', type=int, default=600)
+    parser.add_argument('-t', '--interval', help='refresh interval in seconds', type=float, default=1.0)
+    parser.add_argument('--image', help='write the figure to this image file on every refresh instead of showing it')
+    args = parser.parse_args()
+
+    if args.image:
+        matplotlib.use('Agg')
+    try:
+        follow(args.input, args.cores, args.mem_total, args.window, args.interval, args.image)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,131 @@
+"""Compare how fast CamFlow generates provenance edges with how fast Unicorn processes them.
+
+A speed run is a pair of series: the time (in seconds) at which each batch finished (`ts-camflow-*.txt` for
+CamFlow, `perf-wget-s-*.txt` for Unicorn) and the cumulative number of edges at that time (`edge-<w>-<i>.txt`).
+Both curves are put on a common one-second clock by linear interpolation, from which we get:
+- the instantaneous throughput (edges/second) of each system;
+- the backlog, i.e., the edges CamFlow has generated but Unicorn has not processed yet;
+- the lag, i.e., how long after CamFlow generated an edge Unicorn processed it.
+A configuration cannot keep up with CamFlow when the backlog left when CamFlow finishes would take CamFlow more than
+a tolerance (TOLERANCE seconds by default) to generate: a backlog of a few batches is only the granularity of the
+batches, while a backlog that grows over the run is a queue Unicorn never drains.
+"""
+import os
+import csv
+import glob
+import argparse
+import numpy as np
+import series_cache
+import sweep
+from unicorn_plot import load_script
+
+# the backlog (in seconds of CamFlow generation) a configuration may have left when CamFlow finishes
+TOLERANCE = 30.0
+
+
+def load_run(time_filepath, edge_filepath):
+    """The (times, cumulative edges) of a run, cut to the shorter of the two files."""
+    times = series_cache.load(time_filepath, float)
+    edges = series_cache.load(edge_filepath, float)
+    n = min(len(times), len(edges))
+    return np.asarray(times[:n]), np.asarray(edges[:n])
+
+
+def find_runs(folder):
+    """
+    Find the Unicorn speed runs in @folder: each `perf-wget-s-*-h-*-w-<w>-i-<i>.txt` with its `edge-<w>-<i>.txt`.
+
+    :return: a list of (params, time file path, edge file path); runs without an edge file are left out
+    """
+    runs = []
+    for params, filepath in sweep.discover(folder, 'perf-wget-s-*.txt'):
+        edge_filepath = os.path.join(folder, 'edge-{}-{}.txt'.format(params.get('w'), params.get('i')))
+        if os.path.exists(edge_filepath):
+            runs.append((params, filepath, edge_filepath))
+    return runs
+
+
+def analyze(camflow, unicorn, step=1.0, tolerance=TOLERANCE):
+    """
+    Compare the CamFlow run @camflow with the Unicorn run @unicorn, both (times, cumulative edges).
+
+    :param step: the resolution of the common clock in seconds
+    :param tolerance: the final backlog, in seconds of CamFlow generation, above which Unicorn does not keep up
+    :return: a dict of the summary numbers (rates in edges/second, lags in seconds, backlogs in edges) and of the
+    series on the common clock: time, generated, processed, backlog and the instantaneous throughput of each system
+    """
+    # interpolation needs increasing times: clean them up as prepare-camflow-perf does
+    monotone = load_script('prepare-camflow-perf').monotone
+    cf_times, cf_edges = monotone(camflow[0]), camflow[1]
+    uc_times, uc_edges = monotone(unicorn[0]), unicorn[1]
+    clock = np.arange(0.0, max(cf_times[-1], uc_times[-1]) + step, step)
+    # nothing is generated/processed before the first batch, and totals stay flat after the last one
+    generated = np.interp(clock, cf_times, cf_edges, left=0.0)
+    processed = np.interp(clock, uc_times, uc_edges, left=0.0)
+    # Unicorn cannot process more than what CamFlow generated in the part where the two overlap
+    backlog = generated - np.minimum(processed, generated[-1])
+
+    # lag of every Unicorn batch whose edges CamFlow generated within its run
+    shared = uc_edges <= cf_edges[-1]
+    generated_at = np.interp(uc_edges[shared], cf_edges, cf_times)
+    lags = uc_times[shared] - generated_at
+
+    camflow_rate = cf_edges[-1] / cf_times[-1] if cf_times[-1] > 0 else float('inf')
+    unicorn_rate = uc_edges[-1] / uc_times[-1] if uc_times[-1] > 0 else float('inf')
+    final_backlog = float(backlog[np.searchsorted(clock, cf_times[-1])])
+    return dict(
+        camflow_rate=camflow_rate,
+        unicorn_rate=unicorn_rate,
+        peak_unicorn_rate=float(np.max(np.diff(processed)) / step) if len(clock) > 1 else 0.0,
+        max_backlog=float(backlog.max()),
+        final_backlog=final_backlog,
+        max_lag=float(lags.max()) if len(lags) else float('nan'),
+        keeps_up=final_backlog <= tolerance * camflow_rate,
+        clock=clock,
+        generated=generated,
+        processed=processed,
+        backlog=backlog,
+        camflow_throughput=np.diff(generated) / step,
+        unicorn_throughput=np.diff(processed) / step,
+    )
+
+
+SUMMARY = ('unicorn_rate', 'peak_unicorn_rate', 'camflow_rate', 'max_backlog', 'final_backlog', 'max_lag', 'keeps_up')
+
+
+def analyze_sweep(camflow, folders, step=1.0, tolerance=TOLERANCE):
+    """
+    analyze every Unicorn run found in @folders (see find_runs) against the CamFlow run @camflow.
+
+    :return: a list of (params, time file path, summary dict)
+    """
+    results = []
+    for folder in folders:
+        for params, time_filepath, edge_filepath in find_runs(folder):
+            result = analyze(camflow, load_run(time_filepath, edge_filepath), step, tolerance)
+            results.append((params, time_filepath, dict((k, result[k]) for k in SUMMARY)))
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Compute the throughput, backlog and lag of Unicorn w.r.t. CamFlow for every configuration of a speed sweep.')
+    parser.add_argument('-t', '--camflow-time', help='CamFlow timestamp file path', default='../data/perf_speed_camflow/ts-camflow-s-2000-h-3-w-1000-i-6000.txt')
+    parser.add_argument('-e', '--camflow-edge', help='CamFlow edge count file path', default='../data/perf_speed_camflow/edge-1000-6000.txt')
+    parser.add_argument('-d', '--dir', help='folder(s) of Unicorn speed runs', nargs='+', default=sorted(glob.glob('../data/perf_speed_*_unicorn')))
+    parser.add_argument('-s', '--step', help='resolution of the common clock in seconds', type=float, default=1.0)
+    parser.add_argument('--tolerance', help='final backlog (in seconds of CamFlow generation) above which a configuration does not keep up', type=float, default=TOLERANCE)
+    parser.add_argument('-o', '--output', help='output CSV file path (default: print a table)')
+    args = parser.parse_args()
+
+    results = analyze_sweep(load_run(args.camflow_time, args.camflow_edge), args.dir, args.step, args.tolerance)
+    rows = [[os.path.basename(fp)] + [summary[k] for k in SUMMARY] for _, fp, summary in results]
+    if args.output:
+        with open(args.output, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(('run',) + SUMMARY)
+            writer.writerows(rows)
+    else:
+        print('{:<45} {:>10} {:>10} {:>10} {:>11} {:>11} {:>8} {}'.format('run', *SUMMARY))
+        for row in rows:
+            print('{:<45} {:>10.1f} {:>10.1f} {:>10.1f} {:>11.0f} {:>11.0f} {:>8.1f} {}'.format(*row))
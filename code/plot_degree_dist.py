@@ -1,64 +1,244 @@
 """Plot degree distribution of provenance graph generated by CamFlow and Other Systems."""
 import os
 import argparse
-import matplotlib.pyplot as plt
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import datafile
+import canvas
 
 
-def read_degrees(folder):
+def read_degree_file(filepath):
+    """
+    Read a single degree file (one `<node>,<degree>` line per node).
+
+    :param filepath: the degree file path (possibly compressed, see datafile)
+    :return: a NumPy int64 array of the degrees in the file
+    """
+    with datafile.open_input(filepath) as f:
+        return np.loadtxt(f, delimiter=',', usecols=1, dtype=np.int64, ndmin=1)
+
+
+def degree_files(folder):
+    """The degree files in @folder, skipping hidden files such as checksums."""
+    return [os.path.join(folder, fn) for fn in sorted(os.listdir(folder)) if not fn.startswith('.')]
+
+
+def read_degrees(folder, jobs=None):
     """
     Read degree files generated by Unicorn-Java.
 
     :param folder: The location of the folder that contains degree files. Apache Flink, when processing the graph,
-    generates multiple files simultaneously.
-    :return: An array that contains the degrees of the graph.
+    generates multiple files simultaneously. They are parsed concurrently.
+    :param jobs: the number of worker processes (default: number of cores; 1 reads the files in this process)
+    :return: A NumPy int64 array that contains the degrees of the graph.
     """
 
-    data = list()
+    filepaths = degree_files(folder)
+    if jobs == 1 or len(filepaths) <= 1:
+        parts = [read_degree_file(fp) for fp in filepaths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parts = list(pool.map(read_degree_file, filepaths))
 
-    filenames = os.listdir(folder)
-    for fn in filenames:
-        with open(os.path.join(folder, fn), 'r') as f:
-            for line in f:
-                data.append(int(line.strip().split(',')[1]))
+    return np.concatenate(parts) if parts else np.array([], dtype=np.int64)
 
-    return data
 
+class DegreeHistogram(object):
+    """
+    Degree counts over fixed bins, built incrementally so that the degrees never need to be held in memory at once.
+    Histograms with the same bins (e.g., of different part-files or different graphs) can be merged.
 
-def plot_hist(data, xlabel_str, ylabel_str, savefilepath, with_legend=False):
+    :param edges: the bin edges; bin i counts the degrees d with edges[i] <= d < edges[i + 1].
+    Degrees at or above the last edge are counted in @overflow.
+    """
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.overflow = 0
+        self.total = 0
+
+    @classmethod
+    def linear(cls, max_degree, num_bins=20):
+        """Histogram of @num_bins equal-width bins over [0, @max_degree]."""
+        return cls(np.linspace(0, max_degree + 1, num_bins + 1))
+
+    @classmethod
+    def log(cls, max_degree, num_bins=20):
+        """Histogram of a [0, 1) bin followed by @num_bins - 1 log-spaced bins over [1, @max_degree]."""
+        return cls(np.concatenate(([0], np.geomspace(1, max_degree + 1, num_bins))))
+
+    def update(self, degrees):
+        """Count the degrees in the array @degrees."""
+        degrees = np.asarray(degrees)
+        pos = np.searchsorted(self.edges, degrees, side='right') - 1
+        in_range = (pos >= 0) & (pos < len(self.counts))
+        self.counts += np.bincount(pos[in_range], minlength=len(self.counts))
+        self.overflow += int(np.count_nonzero(pos >= len(self.counts)))
+        self.total += len(degrees)
+        return self
+
+    def merge(self, other):
+        """Add the counts of @other, a histogram with the same bins."""
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("cannot merge histograms with different bins")
+        self.counts += other.counts
+        self.overflow += other.overflow
+        self.total += other.total
+        return self
+
+    def ccdf(self):
+        """
+        The complementary cumulative distribution at the lower edge of each bin, i.e., the fraction of nodes whose degree is at least that edge.
+
+        :return: the lower bin edges and the fractions
+        """
+        at_least = np.cumsum(self.counts[::-1])[::-1] + self.overflow
+        return self.edges[:-1], at_least / float(max(self.total, 1))
+
+
+def histogram_degree_file(filepath, edges, chunk_lines=1 << 20):
+    """
+    Count the degrees of a single degree file into a DegreeHistogram with bins @edges, reading @chunk_lines lines at a time.
+    """
+    hist = DegreeHistogram(edges)
+    with datafile.open_input(filepath) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_lines))
+            if not lines:
+                break
+            hist.update(np.loadtxt(lines, delimiter=',', usecols=1, dtype=np.int64, ndmin=1))
+    return hist
+
+
+def histogram_degrees(folders, edges, jobs=None):
+    """
+    Build the degree histogram of the graphs in @folders (each a folder of degree files, see read_degrees) in one pass.
+    Each degree file is counted separately, concurrently, and the partial histograms are merged, so memory does not depend on the size of the graphs.
+
+    :param folders: the folders of degree files
+    :param edges: the bin edges (see DegreeHistogram)
+    :param jobs: the number of worker processes (default: number of cores; 1 reads the files in this process)
+    :return: a DegreeHistogram
+    """
+
+    filepaths = [fp for folder in folders for fp in degree_files(folder)]
+    hist = DegreeHistogram(edges)
+    if jobs == 1 or len(filepaths) <= 1:
+        parts = (histogram_degree_file(fp, edges) for fp in filepaths)
+        for part in parts:
+            hist.merge(part)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for part in pool.map(histogram_degree_file, filepaths, itertools.repeat(edges)):
+                hist.merge(part)
+    return hist
+
+
+def write_histogram(hist, filepath):
+    """
+    Write the DegreeHistogram @hist as a CSV file with one `low,high,count,ccdf` row per bin, where @ccdf is the
+    fraction of nodes whose degree is at least @low. Degrees beyond the last bin are counted in a final `<last edge>,inf` row.
+    """
+    degrees, fractions = hist.ccdf()
+    with open(filepath, 'w') as f:
+        f.write('low,high,count,ccdf\n')
+        for low, high, count, fraction in zip(degrees.tolist(), hist.edges[1:].tolist(), hist.counts.tolist(), fractions.tolist()):
+            f.write('{},{},{},{}\n'.format(low, high, count, fraction))
+        f.write('{},inf,{},{}\n'.format(hist.edges[-1], hist.overflow, hist.overflow / float(max(hist.total, 1))))
+
+
+def plot_hist(data, xlabel_str, ylabel_str, savefilepath, with_legend=False, num_bins=20, ymax=100, log_x=False):
     """
     Plot the histogram of the degree data.
 
-    :param data: the degree data
+    :param data: the degree data, or a DegreeHistogram
     :param xlabel_str: label string of the x-axis
     :param ylabel_str: label string of the y-axis
     :param savefilepath: the file path to save the generated plot in PDF
     :param with_legend: include the legend in the figure
+    :param num_bins: the number of bins (ignored for a DegreeHistogram, which has its own bins)
+    :param ymax: the upper limit of the y-axis, or None to fit the counts
+    :param log_x: use a log scale on the x-axis (e.g., for log-spaced bins)
     :return: None
     """
 
-    num_bins = 20
-
-    fig, ax = plt.subplots()
-    n, bins, patches = ax.hist(data, num_bins)
+    fig, ax = canvas.subplots()
+    if isinstance(data, DegreeHistogram):
+        ax.stairs(data.counts, data.edges, fill=True)
+    else:
+        n, bins, patches = ax.hist(data, num_bins)
+    if log_x:
+        # symlog keeps the [0, 1) bin visible
+        ax.set_xscale('symlog', linthresh=1)
 
     # set labels
     ax.set_xlabel(xlabel_str)
     ax.set_ylabel(ylabel_str)
     # ax.set_xlim(left=0, right=15000)
-    ax.set_ylim(bottom=0, top=100)
+    ax.set_ylim(bottom=0, top=ymax)
     if with_legend:
         ax.legend(loc=9, prop={'size': 6}, bbox_to_anchor=(0.5, -0.3), ncol=4)
 
     fig.tight_layout()
-    plt.savefig(savefilepath, format='pdf', bbox_inches='tight')
+    canvas.save(fig, savefilepath, format='pdf', bbox_inches='tight')
+
+
+def plot_ccdf(hists, legend_array, xlabel_str, ylabel_str, savefilepath):
+    """
+    Plot the complementary cumulative degree distribution of each histogram in @hists on a log-log scale.
+
+    :param hists: a list of DegreeHistogram
+    :param legend_array: the legend of each histogram, or None
+    :param xlabel_str: label string of the x-axis
+    :param ylabel_str: label string of the y-axis
+    :param savefilepath: the file path to save the generated plot in PDF
+    :return: None
+    """
+
+    fig, ax = canvas.subplots()
+    for pos, hist in enumerate(hists):
+        degrees, fractions = hist.ccdf()
+        # 0 cannot be shown on a log scale
+        shown = (degrees > 0) & (fractions > 0)
+        ax.plot(degrees[shown], fractions[shown], marker='.', label=legend_array[pos] if legend_array else None)
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+
+    # set labels
+    ax.set_xlabel(xlabel_str)
+    ax.set_ylabel(ylabel_str)
+    if legend_array:
+        ax.legend(loc='lower left', shadow=False)
+
+    fig.tight_layout()
+    canvas.save(fig, savefilepath, format='pdf', bbox_inches='tight')
 
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description='Plot degree distribution of a provenance graph.')
-    parser.add_argument('-i', '--input', help='input data folder', required=True)
+    parser.add_argument('-i', '--input', help='input data folder(s); the degrees of several graphs are merged', nargs='+', required=True)
     parser.add_argument('-o', '--output', help='input file path to save the plot', required=True)
+    parser.add_argument('-j', '--jobs', help='number of worker processes (default: number of cores)', type=int)
+    parser.add_argument('-b', '--bins', help='number of bins', type=int, default=20)
+    parser.add_argument('--ymax', help='upper limit of the y-axis (default: 100; 0 to fit the counts)', type=float, default=100)
+    parser.add_argument('-s', '--stream', help='count degrees into fixed bins without loading them (requires --max-degree)', action='store_true')
+    parser.add_argument('--max-degree', help='upper end of the bins in streaming mode; larger degrees are only counted in the CCDF', type=int)
+    parser.add_argument('--log-bins', help='use log-spaced bins in streaming mode', action='store_true')
+    parser.add_argument('--ccdf', help='file path to save the log-log CCDF plot in streaming mode')
     args = parser.parse_args()
 
-    data = read_degrees(args.input)
-    plot_hist(data, "Degrees", "Counts", args.output)
+    ymax = args.ymax or None
+    if args.stream:
+        if args.max_degree is None:
+            parser.error('--stream requires --max-degree')
+        bins = DegreeHistogram.log if args.log_bins else DegreeHistogram.linear
+        hist = histogram_degrees(args.input, bins(args.max_degree, args.bins).edges, args.jobs)
+        plot_hist(hist, "Degrees", "Counts", args.output, ymax=ymax, log_x=args.log_bins)
+        if args.ccdf:
+            plot_ccdf([hist], None, "Degrees", "Fraction of Nodes", args.ccdf)
+    else:
+        data = np.concatenate([read_degrees(folder, args.jobs) for folder in args.input])
+        plot_hist(data, "Degrees", "Counts", args.output, num_bins=args.bins, ymax=ymax)
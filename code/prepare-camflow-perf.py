@@ -23,32 +23,81 @@ e.g.,
 9
 9
 12
+
+Many files can be cleaned up at once; dirty (non-numeric) lines are then skipped and reported instead of aborting.
 """
 from __future__ import print_function
 import os, sys, argparse
+import numpy as np
+import series_cache
+
+def read_timestamps(ifp):
+	"""
+	Read the timestamps in @ifp (possibly compressed, see datafile), one per line, in one native pass (see series_cache.read_series).
+	Returns an array of the timestamps and a list of (line number, line) of the dirty lines, which are left out of the array.
+	Blank lines and comments are dirty too.
+	"""
+	timestamps, dirty = series_cache.read_series(ifp, float, strict=True)
+	# with @strict, line k is value k - 1
+	return np.delete(timestamps, [lineno - 1 for lineno, _ in dirty]), dirty
+
+def monotone(timestamps):
+	"""
+	Replace each timestamp by the largest timestamp so far (and negative timestamps by 0.0).
+	A NaN timestamp (e.g., a `nan` line) is ignored: it becomes the largest timestamp so far too.
+	"""
+	# fmax skips NaN where maximum would carry it to every later timestamp
+	return np.fmax.accumulate(np.maximum(timestamps, 0.0))
+
+def write_timestamps(ofp, timestamps):
+	with open(ofp, 'w') as out:
+		out.write(''.join(str(data) + '\n' for data in timestamps.tolist()))
 
 def clean_up(ifp, ofp):
-	out = open(ofp, 'w')
-	current = 0.0
-	with open(ifp, 'r') as f:
-		for line in f:
-			try:
-				data = float(line.strip())
-			except Exception as e:
-				print("Dirty value: {}".format(e))
-				raise RuntimeError("encountered a dirty value")
-			if data > current:
-				current = data
-			elif data < current:
-				data = current
-			out.write(str(data) + '\n')
-	out.close()
-	f.close()
+	timestamps, dirty = read_timestamps(ifp)
+	if dirty:
+		print("Dirty value: line {}: {!r}".format(*dirty[0]))
+		raise RuntimeError("encountered a dirty value")
+	write_timestamps(ofp, monotone(timestamps))
+
+def batch_pairs(inputs, folder):
+	"""
+	Pair each input file path in @inputs with an output file path of the same name in @folder.
+	"""
+	return [(ifp, os.path.join(folder, os.path.basename(ifp))) for ifp in inputs]
+
+def clean_up_batch(pairs):
+	"""
+	Clean up every (input, output) file path pair in @pairs.
+	Raises ValueError before writing anything if two inputs would be written to the same output (e.g., the ts.txt of two runs put in one folder).
+	Dirty lines are skipped instead of raising; returns a list of (input, line number, line) of all of them.
+	"""
+	outputs = dict()
+	for ifp, ofp in pairs:
+		other = outputs.setdefault(os.path.abspath(ofp), ifp)
+		if other != ifp:
+			raise ValueError("{} and {} would both be written to {}".format(other, ifp, ofp))
+	report = []
+	for ifp, ofp in pairs:
+		timestamps, dirty = read_timestamps(ifp)
+		write_timestamps(ofp, monotone(timestamps))
+		report.extend((ifp, lineno, line) for lineno, line in dirty)
+	return report
 
 if __name__ == "__main__":
 	parser = argparse.ArgumentParser(description='Clean up CamFlow Performance Numbers.')
-	parser.add_argument('-i', '--input', help='input data file path', required=True)
-	parser.add_argument('-o', '--output', help='output data file path',  required=True)
+	parser.add_argument('-i', '--input', help='input data file path(s)', nargs='+', required=True)
+	parser.add_argument('-o', '--output', help='output data file path (a folder if there are multiple input files)',  required=True)
+	parser.add_argument('-r', '--report', help='file path to save the dirty lines of multiple input files (default: print them)')
 	args = parser.parse_args()
 
-	clean_up(args.input, args.output)
+	if len(args.input) == 1 and not os.path.isdir(args.output):
+		clean_up(args.input[0], args.output)
+		sys.exit(0)
+	report = clean_up_batch(batch_pairs(args.input, args.output))
+	lines = ''.join("{}:{}: {!r}\n".format(*dirty) for dirty in report)
+	if args.report:
+		with open(args.report, 'w') as f:
+			f.write(lines)
+	elif report:
+		print(lines, end='')
@@ -1,54 +1,19 @@
 import os, sys
+import ps_log
 
-def decompose(input_file, mem_filepath, cpu_filepath):
-	mem = open(mem_filepath, "a+")
-	cpu = open(cpu_filepath, "a+")
-
-	with open(input_file, 'r') as f:
-		cpu_val = 0.0
-		for line in f:
-			data = line.strip().split()
-			if data[0] == '%CPU':
-				next_is_mem = True
-				next_is_cpu = False
-				cpu.write(str(float(cpu_val) / 8) + '\n')
-				cpu_val = 0.0
-				continue
-			if next_is_mem:
-				mem.write(str(float(data[1]) * 61 * 1024 * 0.01) + '\n')
-				next_is_mem = False
-				continue
-			if data[0] == 'PSR':
-				next_is_cpu = True
-				continue
-			if next_is_cpu:
-				if data[0] == '0':
-					cpu_val += float(data[1])
-				elif data[0] == '1':
-					cpu_val += float(data[1])
-				elif data[0] == '2':
-					cpu_val += float(data[1])
-				elif data[0] == '3':
-					cpu_val += float(data[1])
-				elif data[0] == '4':
-					cpu_val += float(data[1])
-				elif data[0] == '5':
-					cpu_val += float(data[1])
-				elif data[0] == '6':
-					cpu_val += float(data[1])
-				elif data[0] == '7':
-					cpu_val += float(data[1])
-
-	f.close()
-	mem.close()
-	cpu.close()
+def decompose(input_file, mem_filepath, cpu_filepath, num_cores=8, mem_total=61 * 1024):
+	snapshots = ps_log.decode(input_file, num_cores)
+	ps_log.write_series(mem_filepath, snapshots.mem_mb(mem_total))
+	ps_log.write_series(cpu_filepath, ps_log.lagged(snapshots.average()))
 
 if __name__ == "__main__":
 	if (len(sys.argv) < 4):
 		print("""
-			Usage: python prepare-cpu-mem.py <input_file> <mem_output> <cpu_output> 
+			Usage: python prepare-cpu-mem.py <input_file> <mem_output> <cpu_output> [<num_cores> <mem_total_mb>]
 		"""
 		)
 		sys.exit(1)
-	decompose(sys.argv[1], sys.argv[2], sys.argv[3])
+	num_cores = int(sys.argv[4]) if len(sys.argv) > 4 else 8
+	mem_total = float(sys.argv[5]) if len(sys.argv) > 5 else 61 * 1024
+	decompose(sys.argv[1], sys.argv[2], sys.argv[3], num_cores, mem_total)
 
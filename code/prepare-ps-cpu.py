@@ -1,31 +1,17 @@
 import os, sys
+import ps_log
 
-def decompose(input_file, mem_filepath, cpu_filepath):
-	mem = open(mem_filepath, "a+")
-	cpu = open(cpu_filepath, "a+")
-
-	with open(input_file, 'r') as f:
-		for line in f:
-			data = line.strip().split()
-			if data[0] == '%CPU':
-				next_is_mem = True
-				continue
-			if next_is_mem:
-				mem.write(str(float(data[1]) * 4096 * 0.01) + '\n')
-				cpu.write(str(float(data[0])) + '\n')
-				next_is_mem = False
-				continue
-
-	f.close()
-	mem.close()
-	cpu.close()
+def decompose(input_file, mem_filepath, cpu_filepath, mem_total=4096):
+	snapshots = ps_log.decode(input_file)
+	ps_log.write_series(mem_filepath, snapshots.mem_mb(mem_total))
+	ps_log.write_series(cpu_filepath, snapshots.total_cpu)
 
 if __name__ == "__main__":
 	if (len(sys.argv) < 4):
 		print("""
-			Usage: python prepare-cpu-mem.py <input_file> <mem_output> <cpu_output>
+			Usage: python prepare-cpu-mem.py <input_file> <mem_output> <cpu_output> [<mem_total_mb>]
 		"""
 		)
 		sys.exit(1)
-	decompose(sys.argv[1], sys.argv[2], sys.argv[3])
-
+	mem_total = float(sys.argv[4]) if len(sys.argv) > 4 else 4096
+	decompose(sys.argv[1], sys.argv[2], sys.argv[3], mem_total)
@@ -1,209 +1,129 @@
-import csv
-import sys
+import os
+import numpy as np
+import datafile
+import profiling
+
+# Columns of a stats-s-*-h-*-w-*-i-*.csv file
+METRIC, STD, PRECISION, RECALL, ACCURACY, F_MEASURE = 0, 1, 6, 7, 8, 9
+
+
+def load_stats(filepath):
+	"""
+	Load the stats CSV file @filepath (possibly compressed, see datafile).
+	Returns its rows as text and their f-measures as floats ('None' values are loaded as NaN); the other columns are parsed on demand by parse_rows.
+	"""
+	with datafile.open_input(filepath) as data:
+		rows = [line for line in data.read().splitlines() if line.strip()]
+	f_measure = np.array([row[row.rfind(',') + 1:] for row in rows], dtype=str)
+	f_measure[f_measure == 'None'] = 'nan'
+	return rows, f_measure.astype(np.float64)
+
+
+def parse_rows(rows):
+	"""
+	Parse the stats CSV @rows (see load_stats).
+	Returns whether the metric of each row is 'mean', and the std, precision, recall, accuracy and f-measure columns as floats ('None' values are loaded as NaN).
+	"""
+	fields = [row.split(',') for row in rows]
+	is_mean = np.array([row[METRIC] == 'mean' for row in fields], dtype=bool)
+	values = np.array([[row[STD], row[PRECISION], row[RECALL], row[ACCURACY], row[F_MEASURE]] for row in fields], dtype=str).reshape(-1, 5)
+	values[values == 'None'] = 'nan'
+	return is_mean, values.astype(np.float64)
+
+
+def best_rows(group, is_mean, values):
+	"""
+	Index of the best row of each @group of rows of @values (std, precision, recall, accuracy and f-measure columns, see parse_rows).
+	Rows with a NaN (None) rate are skipped. Rows are ranked by f-measure, then accuracy, then precision, then recall;
+	a 'mean' row (@is_mean) beats a 'max' row, a 'mean' row with a larger std beats one with a smaller std, and otherwise the first row wins.
+	Returns a dict that maps each group with at least one valid row to its best row.
+	"""
+	valid = np.flatnonzero(~np.isnan(values[:, 1:]).any(axis=1))
+	if not len(valid):
+		return dict()
+	std, precision, recall, accuracy, f_measure = values[valid].T
+	is_mean = is_mean[valid]
+	std_key = np.where(is_mean, std, -np.inf)
+	# a single sort, by group first; the best row of a group is the last of that group
+	order = valid[np.lexsort((-valid, std_key, is_mean, recall, precision, accuracy, f_measure, group[valid]))]
+	last = np.append(group[order][1:] != group[order][:-1], True)
+	return dict(zip(group[order][last].tolist(), order[last].tolist()))
+
+
+def best_results_batch(filepaths):
+	"""
+	Pick the best threshold in each stats CSV file in @filepaths (see best_rows) with one vectorized pass over all of their rows.
+	Only the f-measures of all rows are parsed: the other columns are parsed for the rows with the best f-measure of their file,
+	which are the only ones that can win (or, if all of them have a None rate, for the rows with the next best f-measure, and so on).
+	Returns, in the same order as @filepaths, the f-measure, precision, recall, accuracy, metric and std (the latter two as they appear in the file) of the best threshold, or Nones if a file has no valid row.
+	"""
+	stats = []
+	for filepath in filepaths:
+		with profiling.stage('parse', filepath):
+			stats.append(load_stats(filepath))
+	if not stats:
+		return []
+	rows = [row for file_rows, _ in stats for row in file_rows]
+	f_measure = np.concatenate([f for _, f in stats])
+	group = np.repeat(np.arange(len(stats)), [len(f) for _, f in stats])
+	best = dict()
+	with profiling.stage('compute', '{} files'.format(len(stats))):
+		while True:
+			top = np.full(len(stats), np.nan)
+			np.fmax.at(top, group, f_measure)
+			candidates = np.flatnonzero(f_measure == top[group])
+			if not len(candidates):
+				break
+			is_mean, values = parse_rows([rows[row] for row in candidates])
+			for pos, row in best_rows(group[candidates], is_mean, values).items():
+				best[pos] = (candidates[row], values[row])
+			# the files without a valid candidate fall back to their next best f-measure
+			f_measure[candidates] = np.nan
+			f_measure[np.isin(group, list(best))] = np.nan
+	results = []
+	for pos in range(len(stats)):
+		if pos not in best:
+			results.append((None, None, None, None, None, None))
+			continue
+		row, values = best[pos]
+		_, precision, recall, accuracy, f_measure = values.tolist()
+		metric, std = rows[row].split(',', 2)[:2]
+		results.append((f_measure, precision, recall, accuracy, metric, std))
+	return results
+
 
 def best_results(filepath):
-	data = open(filepath, 'r')
-	reader = csv.reader(data)
-
-	best_f_measure = None
-	best_precision = None
-	best_recall = None
-	best_accuracy = None
-	final_metric = None
-	final_std = None
-	for row in reader:
-		metric = row[0]
-		std = row[1]
-		precision = row[6]
-		recall = row[7]
-		accuracy = row[8]
-		f_measure = row[9]
-		if f_measure == 'None' or precision == 'None' or recall == 'None' or accuracy == 'None':
-			continue
-		else:
-			precision = float(row[6])
-			recall = float(row[7])
-			accuracy = float(row[8])
-			f_measure = float(row[9])
-		if best_f_measure == None or float(f_measure) > best_f_measure:
-			best_f_measure = f_measure
-			best_precision = precision
-			best_recall = recall
-			best_accuracy = accuracy
-			final_metric = metric
-			final_std = std
-		elif f_measure == best_f_measure:
-			if accuracy > best_accuracy:
-				best_f_measure = f_measure
-				best_precision = precision
-				best_recall = recall
-				best_accuracy = accuracy
-				final_metric = metric
-				final_std = std
-			elif accuracy == best_accuracy:
-				if precision > best_precision:
-					best_f_measure = f_measure
-					best_precision = precision
-					best_recall = recall
-					best_accuracy = accuracy
-					final_metric = metric
-					final_std = std
-				elif precision == best_precision:
-					if recall > best_recall:
-						best_f_measure = f_measure
-						best_precision = precision
-						best_recall = recall
-						best_accuracy = accuracy
-						final_metric = metric
-						final_std = std
-					elif recall == best_recall:
-						if metric == 'mean' and final_metric == 'max':
-							best_f_measure = f_measure
-							best_precision = precision
-							best_recall = recall
-							best_accuracy = accuracy
-							final_metric = metric
-							final_std = std
-						elif metric == final_metric == 'mean':
-							if std > final_std:
-								best_f_measure = f_measure
-								best_precision = precision
-								best_recall = recall
-								best_accuracy = accuracy
-								final_metric = metric
-								final_std = std
-	return best_f_measure, best_precision, best_recall, best_accuracy, final_metric, final_std
+	"""
+	Pick the best threshold in the stats CSV file @filepath (see best_rows).
+	Returns its f-measure, precision, recall, accuracy, metric and std (the latter two as they appear in the file).
+	"""
+	return best_results_batch([filepath])[0]
 
-if __name__ == "__main__":
-	if (len(sys.argv) < 1):
-		print("""
-			Usage: python prepare.py
-		"""
-		)
-		sys.exit(1)
-	sketch_f_measure_perf = open("../data/sketch-f-measure-perf.txt", "a+")
-	sketch_precision_perf = open("../data/sketch-precision-perf.txt", "a+")
-	sketch_recall_perf = open("../data/sketch-recall-perf.txt", "a+")
-	sketch_accuracy_perf = open("../data/sketch-accuracy-perf.txt", "a+")
-
-	best_f_measure_500, best_precision_500, best_recall_500, best_accuracy_500, _, _ = best_results("../data/stats-s-500-h-3-w-450-i-10000.csv")
-	best_f_measure_1000, best_precision_1000, best_recall_1000, best_accuracy_1000, _, _ = best_results("../data/stats-s-1000-h-3-w-450-i-10000.csv")
-	best_f_measure_1500, best_precision_1500, best_recall_1500, best_accuracy_1500, _, _ = best_results("../data/stats-s-1500-h-3-w-450-i-10000.csv")
-	best_f_measure_2000, best_precision_2000, best_recall_2000, best_accuracy_2000, _, _ = best_results("../data/stats-s-2000-h-3-w-450-i-10000.csv")
-	best_f_measure_3000, best_precision_3000, best_recall_3000, best_accuracy_3000, _, _ = best_results("../data/stats-s-3000-h-3-w-450-i-10000.csv")
-
-	sketch_f_measure_perf.write(str(best_f_measure_500) + '\n')
-	sketch_f_measure_perf.write(str(best_f_measure_1000) + '\n')
-	sketch_f_measure_perf.write(str(best_f_measure_1500) + '\n')
-	sketch_f_measure_perf.write(str(best_f_measure_2000) + '\n')
-	sketch_f_measure_perf.write(str(best_f_measure_3000) + '\n')
-
-	sketch_precision_perf.write(str(best_precision_500) + '\n')
-	sketch_precision_perf.write(str(best_precision_1000) + '\n')
-	sketch_precision_perf.write(str(best_precision_1500) + '\n')
-	sketch_precision_perf.write(str(best_precision_2000) + '\n')
-	sketch_precision_perf.write(str(best_precision_3000) + '\n')
-
-	sketch_recall_perf.write(str(best_recall_500) + '\n')
-	sketch_recall_perf.write(str(best_recall_1000) + '\n')
-	sketch_recall_perf.write(str(best_recall_1500) + '\n')
-	sketch_recall_perf.write(str(best_recall_2000) + '\n')
-	sketch_recall_perf.write(str(best_recall_3000) + '\n')
-
-	sketch_accuracy_perf.write(str(best_accuracy_500) + '\n')
-	sketch_accuracy_perf.write(str(best_accuracy_1000) + '\n')
-	sketch_accuracy_perf.write(str(best_accuracy_1500) + '\n')
-	sketch_accuracy_perf.write(str(best_accuracy_2000) + '\n')
-	sketch_accuracy_perf.write(str(best_accuracy_3000) + '\n')
-
-	sketch_f_measure_perf.close()
-	sketch_precision_perf.close()
-	sketch_recall_perf.close()
-	sketch_accuracy_perf.close()
-
-	window_f_measure_perf = open("../data/window-f-measure-perf.txt", "a+")
-	window_precision_perf = open("../data/window-precision-perf.txt", "a+")
-	window_recall_perf = open("../data/window-recall-perf.txt", "a+")
-	window_accuracy_perf = open("../data/window-accuracy-perf.txt", "a+")
-
-	best_f_measure_200, best_precision_200, best_recall_200, best_accuracy_200, _, _ = best_results("../data/stats-s-2000-h-3-w-200-i-10000.csv")
-	best_f_measure_450, best_precision_450, best_recall_450, best_accuracy_450, _, _ = best_results("../data/stats-s-2000-h-3-w-450-i-10000.csv")
-	best_f_measure_1500, best_precision_500, best_recall_500, best_accuracy_500, _, _ = best_results("../data/stats-s-2000-h-3-w-500-i-10000.csv")
-	best_f_measure_1000, best_precision_1000, best_recall_1000, best_accuracy_1000, _, _ = best_results("../data/stats-s-2000-h-3-w-1000-i-10000.csv")
-	best_f_measure_2000, best_precision_2000, best_recall_2000, best_accuracy_2000, _, _ = best_results("../data/stats-s-2000-h-3-w-2000-i-10000.csv")
-
-	window_f_measure_perf.write(str(best_f_measure_200) + '\n')
-	window_f_measure_perf.write(str(best_f_measure_450) + '\n')
-	window_f_measure_perf.write(str(best_f_measure_500) + '\n')
-	window_f_measure_perf.write(str(best_f_measure_1000) + '\n')
-	window_f_measure_perf.write(str(best_f_measure_2000) + '\n')
-
-	window_precision_perf.write(str(best_precision_200) + '\n')
-	window_precision_perf.write(str(best_precision_450) + '\n')
-	window_precision_perf.write(str(best_precision_500) + '\n')
-	window_precision_perf.write(str(best_precision_1000) + '\n')
-	window_precision_perf.write(str(best_precision_2000) + '\n')
-
-	window_recall_perf.write(str(best_recall_200) + '\n')
-	window_recall_perf.write(str(best_recall_450) + '\n')
-	window_recall_perf.write(str(best_recall_500) + '\n')
-	window_recall_perf.write(str(best_recall_1000) + '\n')
-	window_recall_perf.write(str(best_recall_2000) + '\n')
-
-	window_accuracy_perf.write(str(best_accuracy_200) + '\n')
-	window_accuracy_perf.write(str(best_accuracy_450) + '\n')
-	window_accuracy_perf.write(str(best_accuracy_500) + '\n')
-	window_accuracy_perf.write(str(best_accuracy_1000) + '\n')
-	window_accuracy_perf.write(str(best_accuracy_2000) + '\n')
-
-	window_f_measure_perf.close()
-	window_precision_perf.close()
-	window_recall_perf.close()
-	window_accuracy_perf.close()
-
-	hop_f_measure_perf = open("../data/hop-f-measure-perf.txt", "a+")
-	hop_precision_perf = open("../data/hop-precision-perf.txt", "a+")
-	hop_recall_perf = open("../data/hop-recall-perf.txt", "a+")
-	hop_accuracy_perf = open("../data/hop-accuracy-perf.txt", "a+")
-
-	best_f_measure_1, best_precision_1, best_recall_1, best_accuracy_1, _, _ = best_results("../data/stats-s-2000-h-1-w-450-i-10000.csv")
-	best_f_measure_2, best_precision_2, best_recall_2, best_accuracy_2, _, _ = best_results("../data/stats-s-2000-h-2-w-450-i-10000.csv")
-	best_f_measure_3, best_precision_3, best_recall_3, best_accuracy_3, _, _ = best_results("../data/stats-s-2000-h-3-w-450-i-10000.csv")
-	best_f_measure_4, best_precision_4, best_recall_4, best_accuracy_4, _, _ = best_results("../data/stats-s-2000-h-4-w-450-i-10000.csv")
-	best_f_measure_5, best_precision_5, best_recall_5, best_accuracy_5, _, _ = best_results("../data/stats-s-2000-h-5-w-450-i-10000.csv")
-
-	hop_f_measure_perf.write(str(best_f_measure_1) + '\n')
-	hop_f_measure_perf.write(str(best_f_measure_2) + '\n')
-	hop_f_measure_perf.write(str(best_f_measure_3) + '\n')
-	hop_f_measure_perf.write(str(best_f_measure_4) + '\n')
-	hop_f_measure_perf.write(str(best_f_measure_5) + '\n')
-
-	hop_precision_perf.write(str(best_precision_1) + '\n')
-	hop_precision_perf.write(str(best_precision_2) + '\n')
-	hop_precision_perf.write(str(best_precision_3) + '\n')
-	hop_precision_perf.write(str(best_precision_4) + '\n')
-	hop_precision_perf.write(str(best_precision_5) + '\n')
-
-	hop_recall_perf.write(str(best_recall_1) + '\n')
-	hop_recall_perf.write(str(best_recall_2) + '\n')
-	hop_recall_perf.write(str(best_recall_3) + '\n')
-	hop_recall_perf.write(str(best_recall_4) + '\n')
-	hop_recall_perf.write(str(best_recall_5) + '\n')
-
-	hop_accuracy_perf.write(str(best_accuracy_1) + '\n')
-	hop_accuracy_perf.write(str(best_accuracy_2) + '\n')
-	hop_accuracy_perf.write(str(best_accuracy_3) + '\n')
-	hop_accuracy_perf.write(str(best_accuracy_4) + '\n')
-	hop_accuracy_perf.write(str(best_accuracy_5) + '\n')
-
-	hop_f_measure_perf.close()
-	hop_precision_perf.close()
-	hop_recall_perf.close()
-	hop_accuracy_perf.close()	
 
+# Each sweep varies one parameter of this default setting
+BASELINE = dict(s=2000, h=3, w=450, i=10000)
+SWEEPS = (("sketch", "s"), ("window", "w"), ("hop", "h"))
 
 
+def prepare_sweeps(folder, jobs=None):
+	"""
+	Pick the best threshold of every stats CSV file in @folder (using @jobs worker processes, see sweep.evaluate)
+	and write the per-metric files of each sweep of SWEEPS (e.g., sketch-f-measure-perf.txt) in @folder.
+	"""
+	import sweep
+	results = sweep.evaluate(sweep.discover(folder, "stats-*.csv"), jobs)
+	for name, axis in SWEEPS:
+		sweep.write_metric_files(results, axis, BASELINE, os.path.join(folder, name + "-{}-perf.txt"))
 
 
+if __name__ == "__main__":
+	import argparse
 
+	parser = argparse.ArgumentParser(description='Pick the best threshold of every stats file of a folder and write the per-metric files of each sweep.')
+	parser.add_argument('stats_folder', help='folder of the stats CSV files (default: ../data)', nargs='?', default="../data")
+	parser.add_argument('--profile', help='record the cost of parsing each stats file and of picking the thresholds to this JSON or CSV file; runs in this process')
+	parser.add_argument('--cprofile', help='also dump cProfile statistics of the run to this file (see profiling)')
+	args = parser.parse_args()
 
+	with profiling.profiled(args.profile, args.cprofile):
+		prepare_sweeps(args.stats_folder, 1 if args.profile or args.cprofile else None)
@@ -0,0 +1,191 @@
+"""Measure where the time and memory of a run go, stage by stage.
+
+The code that reads, computes and draws marks its stages, e.g., `with profiling.stage('parse', filepath):`.
+Stages cost nothing (a shared no-op context) unless a Profiler is active, e.g.,
+
+with profiling.Profiler(cprofile='render.pstats') as profiler:
+    render.render_all(figures, jobs=1)
+profiler.write('profile.csv')
+
+in which case each stage records, for its subject (the input file or the figure):
+- wall: the elapsed time in seconds;
+- cpu: the CPU time of the process (all threads) in seconds;
+- peak_rss: the peak resident set size of the process during the stage, in bytes;
+- bytes_read: the bytes the process read (from files, pipes, ...) during the stage.
+Stages may be nested (e.g., 'parse' within 'load', 'save' within 'draw'): the wall and CPU times and the bytes read of
+a stage exclude those of the stages nested in it, so that the records of a run add up to its total.
+Only the stages of this process are recorded, so profile a single-process run (e.g., jobs=1).
+
+Peak RSS and bytes read come from /proc on Linux, where the peak can be reset at the start of each stage. Elsewhere,
+the bytes read are not recorded and the peak RSS is that of the process so far. The Profiler can also run cProfile
+over the whole run and dump its statistics for pstats or snakeviz.
+"""
+import csv
+import json
+import time
+import argparse
+import resource
+import contextlib
+
+FIELDS = ('stage', 'subject', 'wall', 'cpu', 'peak_rss', 'bytes_read')
+
+_active = []
+_nothing = contextlib.nullcontext()
+
+
+def _bytes_read():
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except (IOError, OSError):
+        pass
+    return None
+
+
+def _peak_rss():
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _reset_peak_rss():
+    """Reset the peak RSS of the process to its current RSS; False if it cannot be reset."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except (IOError, OSError):
+        return False
+
+
+class Profiler(object):
+    """
+    Records the cost of the stages of a run (see the module documentation) while it is active (in a `with` block).
+
+    :param cprofile: if set, also run cProfile while active and dump its statistics to this file path
+    """
+
+    def __init__(self, cprofile=None):
+        self.cprofile = cprofile
+        self.records = []
+        self._open = []
+        self._cprofile = None
+
+    @contextlib.contextmanager
+    def stage(self, name, subject=None):
+        """Record the stage @name of @subject (e.g., a file path or a figure name) around the body of the `with` block."""
+        # the peak RSS is reset for this stage, so fold the peak so far into the stages it is nested in
+        peak = _peak_rss()
+        for entry in self._open:
+            entry['peak_rss'] = max(entry['peak_rss'], peak)
+        _reset_peak_rss()
+        entry = dict(stage=name, subject=subject, peak_rss=0, nested_wall=0.0, nested_cpu=0.0, nested_read=0)
+        self._open.append(entry)
+        read, cpu, wall = _bytes_read(), time.process_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            read = _bytes_read() - read if read is not None else None
+            self._open.pop()
+            peak = max(entry['peak_rss'], _peak_rss())
+            if self._open:
+                parent = self._open[-1]
+                parent['nested_wall'] += wall
+                parent['nested_cpu'] += cpu
+                parent['nested_read'] += read or 0
+                parent['peak_rss'] = max(parent['peak_rss'], peak)
+            self.records.append(dict(stage=name, subject=subject, wall=wall - entry['nested_wall'],
+                                     cpu=cpu - entry['nested_cpu'], peak_rss=peak,
+                                     bytes_read=read - entry['nested_read'] if read is not None else None))
+
+    def totals(self):
+        """The records summed by stage (the max of peak_rss), with their count, in the order the stages first ended."""
+        totals = dict()
+        for record in self.records:
+            total = totals.setdefault(record['stage'], dict(stage=record['stage'], count=0, wall=0.0, cpu=0.0, peak_rss=0, bytes_read=None))
+            total['count'] += 1
+            total['wall'] += record['wall']
+            total['cpu'] += record['cpu']
+            total['peak_rss'] = max(total['peak_rss'], record['peak_rss'])
+            if record['bytes_read'] is not None:
+                total['bytes_read'] = (total['bytes_read'] or 0) + record['bytes_read']
+        return list(totals.values())
+
+    def write(self, filepath):
+        """Write the records to @filepath, as JSON if it ends with .json and as CSV otherwise."""
+        if filepath.endswith('.json'):
+            with open(filepath, 'w') as f:
+                json.dump(dict(records=self.records, totals=self.totals()), f, indent=1)
+            return
+        with open(filepath, 'w') as f:
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records)
+
+    def print_totals(self):
+        """Print the totals of each stage (see totals)."""
+        print('{:<10} {:>7} {:>10} {:>10} {:>14} {:>14}'.format('stage', 'count', 'wall (s)', 'cpu (s)', 'peak RSS (MB)', 'read (MB)'))
+        for total in self.totals():
+            read = '{:>14.1f}'.format(total['bytes_read'] / 1e6) if total['bytes_read'] is not None else '{:>14}'.format('-')
+            print('{:<10} {:>7} {:>10.3f} {:>10.3f} {:>14.1f} {}'.format(total['stage'], total['count'], total['wall'],
+                                                                       total['cpu'], total['peak_rss'] / 1e6, read))
+
+    def __enter__(self):
+        if self.cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        _active.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active.remove(self)
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile)
+            self._cprofile = None
+        return False
+
+
+def stage(name, subject=None):
+    """Record the stage @name of @subject with the active Profiler, if any (see Profiler.stage)."""
+    if not _active:
+        return _nothing
+    return _active[-1].stage(name, subject)
+
+
+@contextlib.contextmanager
+def profiled(output=None, cprofile=None):
+    """
+    Profile the body of the `with` block if @output or @cprofile is set (otherwise do nothing), then write the
+    records to @output (see Profiler.write) and print the totals of each stage.
+    """
+    if not output and not cprofile:
+        yield None
+        return
+    with Profiler(cprofile) as profiler:
+        yield profiler
+    if output:
+        profiler.write(output)
+    profiler.print_totals()
+
+
+if __name__ == "__main__":
+    import pstats
+
+    parser = argparse.ArgumentParser(description='Print the functions that took the most time in a cProfile dump (see Profiler).')
+    parser.add_argument('-i', '--input', help='cProfile statistics file path', required=True)
+    parser.add_argument('-s', '--sort', help='sort key (e.g., cumulative, tottime, calls)', default='cumulative')
+    parser.add_argument('-n', '--lines', help='number of functions to print', type=int, default=30)
+    args = parser.parse_args()
+
+    pstats.Stats(args.input).strip_dirs().sort_stats(args.sort).print_stats(args.lines)
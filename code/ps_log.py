@@ -0,0 +1,262 @@
+"""Decode the `ps` CPU/memory logs recorded while Unicorn runs.
+
+A log is a sequence of snapshots. Each snapshot starts with a `%CPU %MEM` header followed by one line for
+the whole Unicorn process, then a `PSR %CPU` header followed by one line per thread (the core it runs on and
+its CPU usage), e.g.,
+%CPU     %MEM
+67.0  0.2
+PSR %CPU
+  3  2.5
+  1 55.5
+  ...
+
+The log is read once in large chunks and every series the `prepare-*` scripts need (total CPU, memory,
+per-core CPU, average CPU over the cores and the busiest core) is produced from that single scan.
+"""
+import os
+import argparse
+from array import array
+import datafile
+
+CHUNK_SIZE = 1 << 20
+
+
+class Snapshots(object):
+    """Series decoded from a ps log, one value per snapshot."""
+
+    def __init__(self, num_cores):
+        self.num_cores = num_cores
+        self.total_cpu = array('d')
+        self.mem = array('d')
+        self.core_sum = array('d')
+        self.cores = [array('d') for _ in range(num_cores)]
+
+    def __len__(self):
+        return len(self.total_cpu)
+
+    def average(self):
+        """Average CPU usage over all @num_cores cores of each snapshot."""
+        return [usage / self.num_cores for usage in self.core_sum]
+
+    def highest(self):
+        """CPU usage of the busiest core of each snapshot."""
+        return [max(usage) for usage in zip(*self.cores)]
+
+    def mem_mb(self, mem_total):
+        """Memory usage of each snapshot in MB, given that the machine has @mem_total MB of memory."""
+        return [m * mem_total * 0.01 for m in self.mem]
+
+
+class Decoder(object):
+    """
+    Incremental ps log decoder. Text can be fed in arbitrary pieces; a line split across two pieces is kept
+    until its end arrives.
+
+    :param num_cores: the number of cores of the machine. Threads reported on other cores are ignored.
+    """
+
+    def __init__(self, num_cores=8):
+        self.snapshots = Snapshots(num_cores)
+        self._tail = ''
+        self._usage = None
+        self._sum = 0.0
+        self._next_is_mem = False
+
+    def feed(self, text):
+        """Decode the complete lines of @text. Return the number of snapshots completed so far."""
+        lines = (self._tail + text).split('\n')
+        self._tail = lines.pop()
+        self._decode(lines)
+        return len(self.snapshots)
+
+    def drain(self):
+        """
+        Remove the snapshots completed so far from the decoder (so that a long log is decoded in constant memory).
+
+        :return: a list of (total CPU, memory %, per-core CPU usage list) of each completed snapshot
+        """
+        snapshots = self.snapshots
+        n = len(snapshots.core_sum)
+        drained = [(snapshots.total_cpu[k], snapshots.mem[k], [usage[k] for usage in snapshots.cores]) for k in range(n)]
+        # the total CPU and memory of the snapshot in progress are already read
+        for series in [snapshots.total_cpu, snapshots.mem, snapshots.core_sum] + snapshots.cores:
+            del series[:n]
+        return drained
+
+    def close(self):
+        """Decode whatever is left (including the last snapshot, which no header follows) and return the snapshots."""
+        if self._tail:
+            self._decode([self._tail])
+            self._tail = ''
+        self._flush()
+        return self.snapshots
+
+    def _flush(self):
+        if self._usage is None:
+            return
+        for core, usage in enumerate(self._usage):
+            self.snapshots.cores[core].append(usage)
+        self.snapshots.core_sum.append(self._sum)
+        self._usage = None
+
+    def _decode(self, lines):
+        num_cores = self.snapshots.num_cores
+        total_cpu = self.snapshots.total_cpu
+        mem = self.snapshots.mem
+        for line in lines:
+            data = line.split()
+            if not data:
+                continue
+            if data[0] == '%CPU':
+                self._flush()
+                self._usage = [0.0] * num_cores
+                self._sum = 0.0
+                self._next_is_mem = True
+                continue
+            if self._next_is_mem:
+                # a garbled summary line still counts as a snapshot, so that the series stay aligned
+                try:
+                    cpu, used = float(data[0]), float(data[1])
+                except (ValueError, IndexError):
+                    cpu, used = float('nan'), float('nan')
+                total_cpu.append(cpu)
+                mem.append(used)
+                self._next_is_mem = False
+                continue
+            if data[0] == 'PSR' or self._usage is None:
+                continue
+            # a truncated or garbled thread line (e.g., of a log that is being written) is skipped
+            try:
+                core, usage = int(data[0]), float(data[1])
+            except (ValueError, IndexError):
+                continue
+            if core < num_cores:
+                self._usage[core] += usage
+                self._sum += usage
+
+
+def decode(input_file, num_cores=8, chunk_size=CHUNK_SIZE):
+    """
+    Decode the ps log @input_file in a single pass.
+
+    :param input_file: the ps log file path (possibly compressed, see datafile)
+    :param num_cores: the number of cores of the machine the log was recorded on
+    :param chunk_size: the number of characters read at a time
+    :return: a Snapshots object
+    """
+    decoder = Decoder(num_cores)
+    with datafile.open_input(input_file) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            decoder.feed(chunk)
+    return decoder.close()
+
+
+def stream(input_file, num_cores=8, chunk_size=CHUNK_SIZE):
+    """
+    Decode the ps log @input_file one snapshot at a time, in constant memory.
+
+    :return: a generator of (total CPU, memory %, per-core CPU usage list) of each snapshot (see Decoder.drain)
+    """
+    decoder = Decoder(num_cores)
+    with datafile.open_input(input_file) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            decoder.feed(chunk)
+            for snapshot in decoder.drain():
+                yield snapshot
+    decoder.close()
+    for snapshot in decoder.drain():
+        yield snapshot
+
+
+class Follower(object):
+    """
+    Follow a ps log that is still being written: each poll decodes only the bytes appended since the last one,
+    and hands over the snapshots it completed (see Decoder.drain), so memory does not grow with the log.
+    If the log shrinks (e.g., it is truncated or replaced), decoding starts over.
+
+    :param filepath: the ps log file path
+    :param num_cores: the number of cores of the machine
+    """
+
+    def __init__(self, filepath, num_cores=8):
+        self.filepath = filepath
+        self.num_cores = num_cores
+        self.offset = 0
+        self.decoder = Decoder(num_cores)
+        # the number of snapshots completed so far
+        self.complete = 0
+
+    def poll(self):
+        """
+        Decode the newly appended bytes.
+
+        :return: a list of (total CPU, memory %, per-core CPU usage list) of each snapshot completed since the
+        last poll (a snapshot is complete once the next begins)
+        """
+        size = os.path.getsize(self.filepath)
+        if size < self.offset:
+            self.offset = 0
+            self.decoder = Decoder(self.num_cores)
+            self.complete = 0
+        if size > self.offset:
+            with open(self.filepath, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+            self.offset += len(data)
+            # ps output is ASCII; latin-1 maps every byte to one character so a read can end anywhere
+            self.decoder.feed(data.decode('latin-1'))
+        snapshots = self.decoder.drain()
+        self.complete += len(snapshots)
+        return snapshots
+
+
+def lagged(series):
+    """
+    The original prepare-cpu-mem* scripts write out a snapshot's per-core usage only when the next `%CPU`
+    header is read, so their series start with 0.0 and miss the last snapshot. Shift @series the same way
+    (an empty series stays empty).
+    """
+    if not len(series):
+        return []
+    return [0.0] + list(series[:-1])
+
+
+def write_series(filepath, series, mode='a+'):
+    """Write @series to @filepath, one value per line, in a single write."""
+    with open(filepath, mode) as f:
+        f.write(''.join(str(float(value)) + '\n' for value in series))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Decode a ps CPU/memory log into per-snapshot series.')
+    parser.add_argument('-i', '--input', help='input ps log file path', required=True)
+    parser.add_argument('-c', '--cores', help='number of cores of the machine', type=int, default=8)
+    parser.add_argument('-m', '--mem-total', help='total memory of the machine in MB', type=float, default=61 * 1024)
+    parser.add_argument('--average', help='output file path of the average CPU usage over all cores')
+    parser.add_argument('--highest', help='output file path of the CPU usage of the busiest core')
+    parser.add_argument('--total', help='output file path of the CPU usage reported for the whole process')
+    parser.add_argument('--mem', help='output file path of the memory usage in MB')
+    parser.add_argument('--core-prefix', help='output file path prefix of the per-core CPU usage, e.g., ../data/cpu-')
+    parser.add_argument('--lagged', help='shift per-core series the way the original scripts did', action='store_true')
+    args = parser.parse_args()
+
+    snapshots = decode(args.input, args.cores)
+    shift = lagged if args.lagged else list
+    if args.average:
+        write_series(args.average, shift(snapshots.average()))
+    if args.highest:
+        write_series(args.highest, shift(snapshots.highest()))
+    if args.total:
+        write_series(args.total, snapshots.total_cpu)
+    if args.mem:
+        write_series(args.mem, snapshots.mem_mb(args.mem_total))
+    if args.core_prefix:
+        for core, usage in enumerate(snapshots.cores):
+            write_series('{}{}.txt'.format(args.core_prefix, core), shift(usage))
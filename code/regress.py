@@ -0,0 +1,242 @@
+"""Check new experiment data for performance regressions against a baseline data tree.
+
+Both trees (e.g., `old_data/` and `data/`) are searched recursively for the runs of each kind of measurement:
+- cpu: the CPU usage series (`cpu-s-*.txt`, `perf-wget-cpu-s-*.txt`, ...), one sample per second;
+- mem: the memory usage series (`mem-s-*.txt`, `perf-wget-mem-s-*.txt`, ...), one sample per second;
+- throughput: the edges processed each second, from either the cumulative edge count sampled every second
+(`perf-wget-attack-*.txt`) or the batch timestamps of a speed run with its edge counts (`perf-wget-s-*.txt` and
+`edge-<w>-<i>.txt`, resampled on a one-second clock);
+and runs of the same kind, workload and parameters (e.g., perf-wget and s-2000-h-3-w-450-i-3000) are compared. The
+workload is the start of the file name, before the kind and the parameters (e.g., perf-wget for
+`perf-wget-cpu-s-*.txt`, perf-extended for `perf-extended-cpu-s-*.txt`, none for `cpu-s-*.txt`); like a
+parameter, it can be ignored to compare runs of differently named workloads. Several runs of a configuration in a
+tree (e.g., copies in several sweep folders) are pooled, identical copies counting once.
+
+A configuration regressed when the mean got worse (CPU or memory up, throughput down) by more than a relative
+@threshold and a one-sided Mann-Whitney U test over the per-second samples says the new samples are
+stochastically worse at significance level @alpha. The test is computed with NumPy (normal approximation with tie
+and continuity corrections, which is accurate for the hundreds of samples of a run). Per-second samples are not
+independent, so p-values are optimistic: the relative threshold is what keeps noise from failing the check.
+"""
+import os
+import re
+import csv
+import json
+import math
+import fnmatch
+import argparse
+import numpy as np
+import series_cache
+import sweep
+import lag
+from unicorn_plot import add_check_arguments
+
+# (kind, file name pattern); the first matching kind wins
+PATTERNS = (
+    ('throughput', re.compile(r'^perf-wget-s-.*\.txt$')),
+    ('throughput', re.compile(r'^perf-wget-attack-.*\.txt$')),
+    ('cpu', re.compile(r'(^|-)cpu-s-.*\.txt$')),
+    ('mem', re.compile(r'(^|-)mem-s-.*\.txt$')),
+)
+# the workload is what comes before the (optional) kind and the first parameter
+WORKLOAD_RE = re.compile(r'^(.*?)-?(?:cpu-|mem-)?s-\d')
+# whether larger values are better, for each kind
+HIGHER_IS_BETTER = dict(throughput=True, cpu=False, mem=False)
+KINDS = ('throughput', 'cpu', 'mem')
+# the order of the parameters in the name of a configuration, as in the file names (others come after, by name)
+PARAMS = ('s', 'h', 'w', 'i')
+
+FIELDS = ('kind', 'workload', 'params', 'old_runs', 'new_runs', 'old_samples', 'new_samples', 'old_mean', 'new_mean', 'delta',
+          'u', 'p', 'regressed')
+
+
+def classify(filepath):
+    """The kind of measurement of @filepath (see PATTERNS), or None."""
+    name = os.path.basename(filepath)
+    for kind, pattern in PATTERNS:
+        if pattern.search(name):
+            return kind
+    return None
+
+
+def workload(filepath):
+    """The workload of the run @filepath, e.g., 'perf-wget' for `perf-wget-cpu-s-2000-h-3-w-450-i-3000.txt` ('' if none)."""
+    match = WORKLOAD_RE.match(os.path.basename(filepath))
+    return match.group(1) if match else ''
+
+
+def per_second(times, edges):
+    """The edges processed in each second of a speed run (@times, cumulative @edges), see lag.load_run."""
+    clock = np.arange(0.0, np.ceil(times[-1]) + 1.0) if len(times) else np.zeros(1)
+    return np.diff(np.interp(clock, times, edges, left=0.0))
+
+
+def load_samples(kind, filepath):
+    """The per-second samples of the run @filepath of @kind."""
+    name = os.path.basename(filepath)
+    if kind == 'throughput' and name.startswith('perf-wget-s-'):
+        params = sweep.parse_params(filepath)
+        edge_filepath = os.path.join(os.path.dirname(filepath), 'edge-{}-{}.txt'.format(params.get('w'), params.get('i')))
+        return per_second(*lag.load_run(filepath, edge_filepath))
+    values = np.asarray(series_cache.load(filepath, float))
+    if kind == 'throughput':
+        # cumulative edge counts, one per second
+        return np.diff(values)
+    return values
+
+
+def find_runs(root, exclude=(), ignore=()):
+    """
+    Find the runs in the tree @root, leaving out the file names matching a glob of @exclude.
+
+    :param ignore: parameters left out of the configurations, e.g., ('i',) to match runs of any batch size, or
+    'workload' to match runs of any workload
+    :return: a dict that maps (kind, sorted tuple of parameters, with the workload) to the list of file paths of
+    its runs
+    """
+    runs = dict()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            kind = classify(name)
+            if kind is None or any(fnmatch.fnmatch(name, pattern) for pattern in exclude):
+                continue
+            filepath = os.path.join(dirpath, name)
+            if name.startswith('perf-wget-s-'):
+                params = sweep.parse_params(name)
+                if not os.path.exists(os.path.join(dirpath, 'edge-{}-{}.txt'.format(params.get('w'), params.get('i')))):
+                    continue
+            params = sweep.parse_params(name)
+            if not params:
+                continue
+            params['workload'] = workload(name)
+            params = tuple(sorted((k, v) for k, v in params.items() if k not in ignore and v != ''))
+            runs.setdefault((kind, params), []).append(filepath)
+    return runs
+
+
+def pooled_samples(kind, filepaths):
+    """The samples of all runs @filepaths of @kind, identical files counting once."""
+    seen = set()
+    samples = []
+    for filepath in filepaths:
+        digest = series_cache.file_hash(filepath)
+        if digest not in seen:
+            seen.add(digest)
+            samples.append(load_samples(kind, filepath))
+    return np.concatenate(samples) if samples else np.empty(0)
+
+
+def rank(values):
+    """The ranks (from 1) of @values, ties getting the average of their ranks; also return the size of each group of ties."""
+    uniques, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    # the average rank of a group of ties is halfway between its first and last rank
+    last = np.cumsum(counts)
+    return ((last - (counts - 1) / 2.0)[inverse.reshape(-1)], counts)
+
+
+def mann_whitney(old, new, alternative='greater'):
+    """
+    One-sided Mann-Whitney U test of whether the samples @new are stochastically greater ('greater') or less
+    ('less') than the samples @old.
+
+    :return: the U statistic of @new and the p-value (normal approximation with tie and continuity corrections)
+    """
+    old = np.asarray(old, dtype=np.float64)
+    new = np.asarray(new, dtype=np.float64)
+    n_old, n_new = len(old), len(new)
+    if not n_old or not n_new:
+        return float('nan'), float('nan')
+    ranks, ties = rank(np.concatenate((old, new)))
+    u = ranks[n_old:].sum() - n_new * (n_new + 1) / 2.0
+    n = n_old + n_new
+    variance = n_old * n_new / 12.0 * ((n + 1) - float(np.sum(ties ** 3 - ties)) / (n * (n - 1)))
+    if variance <= 0:
+        # all samples are equal
+        return float(u), 1.0
+    shift = u - n_old * n_new / 2.0
+    z = (shift - 0.5) / math.sqrt(variance) if alternative == 'greater' else (-shift - 0.5) / math.sqrt(variance)
+    return float(u), 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def label(params):
+    """The name of the configuration of the (key, value) pairs @params without the workload, e.g., s-2000-h-3-w-450-i-3000."""
+    order = sorted((PARAMS.index(k) if k in PARAMS else len(PARAMS), k, v) for k, v in params if k != 'workload')
+    return '-'.join('{}-{}'.format(k, v) for _, k, v in order)
+
+
+def compare(old_root, new_root, threshold=0.05, alpha=0.01, exclude=(), ignore=()):
+    """
+    Compare the runs of the trees @old_root and @new_root that have the same kind, workload and parameters (see find_runs).
+
+    :param threshold: the relative change of the mean beyond which a configuration may have regressed
+    :param alpha: the significance level of the Mann-Whitney U test
+    :return: a list of dicts (see FIELDS), one per configuration found in both trees
+    """
+    old_runs = find_runs(old_root, exclude, ignore)
+    new_runs = find_runs(new_root, exclude, ignore)
+    results = []
+    for kind, params in sorted(set(old_runs) & set(new_runs), key=lambda key: (KINDS.index(key[0]), key[1])):
+        old = pooled_samples(kind, old_runs[(kind, params)])
+        new = pooled_samples(kind, new_runs[(kind, params)])
+        old_mean = float(np.mean(old)) if len(old) else float('nan')
+        new_mean = float(np.mean(new)) if len(new) else float('nan')
+        delta = (new_mean - old_mean) / abs(old_mean) if old_mean else float('nan')
+        better = HIGHER_IS_BETTER[kind]
+        u, p = mann_whitney(old, new, 'less' if better else 'greater')
+        worse = -delta if better else delta
+        results.append(dict(kind=kind, workload=dict(params).get('workload', ''),
+                            params=label(params),
+                            old_runs=len(old_runs[(kind, params)]), new_runs=len(new_runs[(kind, params)]),
+                            old_samples=len(old), new_samples=len(new), old_mean=old_mean, new_mean=new_mean,
+                            delta=delta, u=u, p=p, regressed=bool(worse > threshold and p < alpha)))
+    return results
+
+
+def write_report(results, filepath):
+    """Write @results (see compare) to @filepath, as JSON if it ends with .json and as CSV otherwise."""
+    if filepath.endswith('.json'):
+        with open(filepath, 'w') as f:
+            json.dump(results, f, indent=1)
+        return
+    with open(filepath, 'w') as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def print_report(results):
+    """Print @results (see compare) as a table, one row per configuration."""
+    print('{:<10} {:<16} {:<26} {:>8} {:>8} {:>12} {:>12} {:>8} {:>9}  {}'.format(
+        'kind', 'workload', 'configuration', 'old n', 'new n', 'old mean', 'new mean', 'delta', 'p', 'verdict'))
+    for result in results:
+        print('{:<10} {:<16} {:<26} {:>8} {:>8} {:>12.2f} {:>12.2f} {:>+7.1%} {:>9.2g}  {}'.format(
+            result['kind'], result['workload'] or '-', result['params'], result['old_samples'], result['new_samples'], result['old_mean'],
+            result['new_mean'], result['delta'], result['p'], 'REGRESSED' if result['regressed'] else 'ok'))
+
+
+def check(args):
+    """
+    Run the regression check of the parsed @args (see unicorn_plot.add_check_arguments) and print its report.
+
+    :return: the exit status: 0 if nothing regressed, 1 if a run regressed, 2 if no run could be compared
+    """
+    results = compare(args.old, args.new, args.threshold, args.alpha, args.exclude, args.ignore)
+    if args.output:
+        write_report(results, args.output)
+    if not results:
+        print("No runs of {} and {} have the same kind, workload and parameters".format(args.old, args.new))
+        return 2
+    print_report(results)
+    regressed = sum(result['regressed'] for result in results)
+    if regressed:
+        print("{} of {} runs regressed".format(regressed, len(results)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Compare the CPU, memory and throughput of the runs of two data trees and fail if the new ones regressed.')
+    add_check_arguments(parser)
+    raise SystemExit(check(parser.parse_args()))
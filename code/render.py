@@ -0,0 +1,199 @@
+"""Render the figures described in a JSON manifest (e.g., figures.json) in parallel.
+
+A manifest lists figures, each of which names the plotting function of plot.py that draws it (`kind`),
+the PDF to save (`output`), the data files passed to the function (`inputs`, a list of file paths for each
+array parameter such as `data_arrays` or `x_arrays`) and the remaining keyword arguments (`params`), e.g.,
+{
+    "figures": [
+        {
+            "name": "perf-cpu-camflow-hop",
+            "kind": "plot_scatters",
+            "output": "../plot/perf-cpu-camflow-hop.pdf",
+            "inputs": {"data_arrays": ["../data/perf_cpu_hop_unicorn/perf-wget-cpu-s-2000-h-1-w-3000-i-6000.txt"]},
+            "params": {"tick_interval": 25, "xlabelrotation": 45, ...}
+        }
+    ]
+}
+An input can also be a metric of an experiment workbook, `<workbook>.xlsx#<metric>` or
+`<workbook>.xlsx#<sheet>#<metric>` (e.g., `hop_sheet.xlsx#f_score`, see sheets), which is read from the workbook itself.
+Relative paths are resolved against the directory of the manifest. Figures are independent of each other, so
+they are rendered by a pool of worker processes. Each worker draws on Agg figures recycled from one plot to the
+next (see canvas), so it runs in bounded memory however many figures it renders.
+
+In incremental mode, a stamp database (next to the manifest) records, for each figure, the content hashes of
+its input files and a hash of its kind, parameters and of the code that draws it (plot.py and every local module
+rendering goes through, see RECIPE_MODULES). Like make, a figure is only redrawn
+when its PDF is missing or one of these has changed since it was last rendered.
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg')
+import canvas
+import profiling
+import plot
+import series_cache
+import sheets
+import decimate
+import datafile
+
+# the local modules whose code determines the rendered figures: a change to any of them makes every figure stale
+RECIPE_MODULES = (sys.modules[__name__], plot, decimate, canvas, sheets, series_cache, datafile)
+
+KINDS = ('plot_multilines', 'plot_multilines_x', 'plot_scatters', 'plot_scatters_no_legend',
+         'plot_scatters_legend_out', 'plot_scatters_x', 'plot_hist', 'plot_perf')
+
+
+def load_manifest(filepath):
+    """
+    Load the manifest @filepath and resolve all of its paths.
+
+    :param filepath: the manifest file path
+    :return: a list of figure descriptions (dicts)
+    """
+    base = os.path.dirname(os.path.abspath(filepath))
+    with open(filepath, 'r') as f:
+        figures = json.load(f)['figures']
+    for figure in figures:
+        if figure['kind'] not in KINDS:
+            raise ValueError("figure {} has an unknown kind: {}".format(figure.get('name'), figure['kind']))
+        figure['output'] = os.path.normpath(os.path.join(base, figure['output']))
+        figure['inputs'] = dict((param, [os.path.normpath(os.path.join(base, fp)) for fp in filepaths])
+                                for param, filepaths in figure.get('inputs', dict()).items())
+        figure.setdefault('params', dict())
+        figure.setdefault('name', os.path.splitext(os.path.basename(figure['output']))[0])
+    return figures
+
+
+def load_input(source):
+    """The array of the input @source: a data file, or a metric of a workbook (see sheets.split_source)."""
+    filepath, sheet, metric = sheets.split_source(source)
+    if metric is None:
+        return plot.import_float_data(filepath)
+    return sheets.load_metric(filepath, metric, sheet)
+
+
+def render_figure(figure):
+    """Load the inputs of @figure, draw it and save it. Return the output file path."""
+    kwargs = dict(figure['params'])
+    for param, filepaths in figure['inputs'].items():
+        kwargs[param] = []
+        for fp in filepaths:
+            with profiling.stage('load', fp):
+                kwargs[param].append(load_input(fp))
+    kwargs['savefilepath'] = figure['output']
+    with profiling.stage('draw', figure.get('name')):
+        getattr(plot, figure['kind'])(**kwargs)
+    return figure['output']
+
+
+def render_figure_measured(figure):
+    """Same as render_figure, but also return the peak RSS (in bytes) of the rendering process so far."""
+    output = render_figure(figure)
+    return output, canvas.current().peak_rss
+
+
+class StampDB(object):
+    """
+    Stamps of the figures rendered so far, saved as JSON in @filepath.
+    Input file hashes are also kept (with the mtime and size they were computed at) so that unchanged files are not re-hashed.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        try:
+            with open(filepath, 'r') as f:
+                db = json.load(f)
+        except (IOError, OSError, ValueError):
+            db = dict()
+        self.files = db.get('files', dict())
+        self.figures = db.get('figures', dict())
+
+    def file_hash(self, filepath):
+        stat = os.stat(filepath)
+        entry = self.files.get(filepath)
+        if entry is None or entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            entry = dict(mtime=stat.st_mtime_ns, size=stat.st_size, sha1=series_cache.file_hash(filepath))
+            self.files[filepath] = entry
+        return entry['sha1']
+
+    def stamp(self, figure):
+        """The stamp of @figure: the hashes of its inputs and of everything else that determines its output."""
+        inputs = sorted(set(fp for filepaths in figure['inputs'].values() for fp in filepaths))
+        recipe = json.dumps([figure['kind'], figure['params'], figure['inputs'], figure['output'],
+                             [self.file_hash(module.__file__) for module in RECIPE_MODULES]], sort_keys=True)
+        return dict(output=figure['output'], inputs=dict((fp, self.file_hash(sheets.split_source(fp)[0])) for fp in inputs),
+                    recipe=hashlib.sha1(recipe.encode('utf-8')).hexdigest())
+
+    def is_stale(self, figure):
+        return not os.path.exists(figure['output']) or self.figures.get(figure['name']) != self.stamp(figure)
+
+    def update(self, figure):
+        self.figures[figure['name']] = self.stamp(figure)
+
+    def save(self):
+        with open(self.filepath, 'w') as f:
+            json.dump(dict(files=self.files, figures=self.figures), f, indent=1, sort_keys=True)
+
+
+def stamps_path(manifest):
+    """The stamp database file path of the manifest @manifest."""
+    dirname, basename = os.path.split(os.path.abspath(manifest))
+    return os.path.join(dirname, '.{}.stamps.json'.format(os.path.splitext(basename)[0]))
+
+
+def render_all(figures, jobs=None, stamps=None, memory=False):
+    """
+    Render all @figures with @jobs worker processes (one per core by default; 1 renders in this process).
+    If a StampDB @stamps is given, only the figures that are out of date are rendered.
+
+    :param memory: return the peak RSS of the rendering process with each output (see render_figure_measured)
+    :return: the list of output file paths rendered, or of (output file path, peak RSS) with @memory
+    """
+    if stamps is not None:
+        stale = [figure for figure in figures if stamps.is_stale(figure)]
+        outputs = render_all(stale, jobs, memory=memory)
+        for figure in stale:
+            stamps.update(figure)
+        stamps.save()
+        return outputs
+    if not figures:
+        return []
+    render = render_figure_measured if memory else render_figure
+    if jobs == 1 or len(figures) == 1:
+        return [render(figure) for figure in figures]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(render, figures))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Render the figures described in a manifest.')
+    parser.add_argument('-m', '--manifest', help='manifest file path', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'figures.json'))
+    parser.add_argument('-j', '--jobs', help='number of worker processes (default: number of cores)', type=int)
+    parser.add_argument('-i', '--incremental', help='only render figures whose inputs or parameters changed', action='store_true')
+    parser.add_argument('--memory', help='print the peak RSS of the rendering process after each figure', action='store_true')
+    parser.add_argument('--profile', help='record the cost of each stage (load, parse, draw, save) of each figure and input file to this JSON or CSV file; renders in this process')
+    parser.add_argument('--cprofile', help='also dump cProfile statistics of the run to this file (see profiling)')
+    parser.add_argument('figures', help='names of the figures to render (default: all)', nargs='*')
+    args = parser.parse_args()
+
+    figures = load_manifest(args.manifest)
+    if args.figures:
+        figures = [figure for figure in figures if figure['name'] in args.figures]
+        if not figures:
+            print("No figure named {} in {}".format(', '.join(args.figures), args.manifest))
+            sys.exit(1)
+    stamps = StampDB(stamps_path(args.manifest)) if args.incremental else None
+    # stages are only recorded in this process
+    jobs = 1 if args.profile or args.cprofile else args.jobs
+    with profiling.profiled(args.profile, args.cprofile):
+        for output in render_all(figures, jobs, stamps, args.memory):
+            if args.memory:
+                print("{} (peak RSS {:.1f} MB)".format(output[0], output[1] / 1e6))
+            else:
+                print(output)
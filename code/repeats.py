@@ -0,0 +1,215 @@
+"""Aggregate repeated runs of the same configuration, with bootstrap confidence intervals.
+
+A single run is noisy, so an experiment can be run several times. Repeats of a configuration carry the same
+parameters in their names and are told apart either by their folder (the same file name in `run1/`, `run2/`, ...)
+or by a `-run-<k>` suffix, e.g., `perf-wget-cpu-s-2000-h-3-w-3000-i-6000-run-2.txt`. They are grouped together
+and reduced to:
+- for series (CPU, memory, ...): the mean and median of the runs at each sample, the (e.g., 5th and 95th)
+percentiles of the runs at each sample, and a bootstrap confidence interval of the mean;
+- for detection results (stats files): the mean of the best rates of the runs (see prepare.best_results) and its
+bootstrap confidence interval.
+Runs may have different lengths: each sample is aggregated over the runs that reach it, and has no confidence
+interval (NaN) if fewer than 2 runs reach it. The bootstrap is vectorized over the resamples and the samples:
+resampling the runs of a mean is a matrix product of the resampled run counts (one multinomial draw per resample)
+with the runs, and the distinct draws of a few runs are computed once each. Samples are resampled a chunk at a
+time (CHUNK floats of estimates), so memory stays bounded however long the series; the time grows with the
+samples (2,000 resamples of 5 runs of 50,000 samples take about half a second). The results are written one value
+per line, and drawn by the plotting functions as shaded bands (the `low_arrays` and `high_arrays` of plot_multilines, plot_multilines_x and plot_scatters) or as
+error bars (those of plot_hist).
+"""
+import os
+import re
+import csv
+import argparse
+import numpy as np
+import series_cache
+import series_stats
+import sweep
+import prepare
+
+REPEAT_RE = re.compile(r'-run-\d+(?=\.[^.]*$)')
+RESAMPLES = 2000
+# the number of floats of bootstrap estimates computed at a time
+CHUNK = 1 << 22
+
+SERIES_STATS = ('mean', 'median', 'low', 'high', 'ci_low', 'ci_high', 'runs')
+
+
+def configuration(filepath):
+    """The name shared by the repeats of the run @filepath, i.e., its file name without a -run-<k> suffix."""
+    return REPEAT_RE.sub('', os.path.basename(filepath))
+
+
+def group_runs(folders, pattern):
+    """
+    Find the files matching @pattern in @folders and group the repeats of each configuration.
+
+    :return: a list of (configuration name, params, list of file paths), sorted by parameters
+    """
+    groups = dict()
+    for folder in folders:
+        for params, filepath in sweep.discover(folder, pattern):
+            groups.setdefault(configuration(filepath), (params, []))[1].append(filepath)
+    return sorted(((name, params, sorted(filepaths)) for name, (params, filepaths) in groups.items()),
+                  key=lambda group: (sorted(group[1].items()), group[0]))
+
+
+def bootstrap(samples, statistic='mean', resamples=RESAMPLES, confidence=95, seed=0):
+    """
+    Bootstrap confidence intervals of the @statistic ('mean' or 'median') of the runs at each sample.
+
+    :param samples: a 2-D array with one run per row and one sample per column; NaN where a run has no sample
+    :param confidence: the confidence level in %
+    :return: the lower and upper bounds of the interval at each sample (NaN where fewer than 2 runs have a sample,
+    as a single run says nothing about the spread)
+    """
+    if statistic not in ('mean', 'median'):
+        raise ValueError("unknown statistic: {}".format(statistic))
+    rng = np.random.default_rng(seed)
+    # NaN sorts last, so the r runs that have a sample are the first r rows of its column
+    samples = np.sort(np.asarray(samples, dtype=np.float64), axis=0)
+    counts = (~np.isnan(samples)).sum(axis=0)
+    low = np.full(samples.shape[1], np.nan)
+    high = np.full(samples.shape[1], np.nan)
+    tail = (100.0 - confidence) / 2
+    # the samples reached by the same number of runs are resampled together, a chunk of columns at a time
+    for runs in np.unique(counts[counts > 1]).tolist():
+        columns = np.flatnonzero(counts == runs)
+        # a resample only depends on how many times it draws each run, and a few runs have few distinct draws
+        # (126 for 5 runs), so each distinct draw is computed once and counted as often as it was drawn
+        if statistic == 'mean':
+            draws, frequencies = np.unique(rng.multinomial(runs, np.full(runs, 1.0 / runs), size=resamples),
+                                           axis=0, return_counts=True)
+            weights = draws / float(runs)
+            width = max(1, CHUNK // resamples)
+        else:
+            draws, frequencies = np.unique(np.sort(rng.integers(0, runs, size=(resamples, runs)), axis=1),
+                                           axis=0, return_counts=True)
+            width = max(1, CHUNK // (resamples * runs))
+        for start in range(0, len(columns), width):
+            chunk = columns[start:start + width]
+            values = samples[:runs, chunk]
+            estimates = weights @ values if statistic == 'mean' else np.median(values[draws], axis=1)
+            low[chunk], high[chunk] = _percentiles(estimates, frequencies, (tail, 100.0 - tail))
+    return low, high
+
+
+def _percentiles(estimates, frequencies, q):
+    # np.percentile(np.repeat(estimates, frequencies, axis=0), q, axis=0), without repeating the estimates
+    # unless most of them are distinct (np.percentile then partitions faster than the estimates can be sorted)
+    n = int(frequencies.sum())
+    if 4 * len(frequencies) > n:
+        return np.percentile(np.repeat(estimates, frequencies, axis=0), q, axis=0)
+    order = np.argsort(estimates, axis=0)
+    ordered = np.take_along_axis(estimates, order, axis=0)
+    # the number of resamples up to each estimate, in order
+    ends = np.cumsum(frequencies[order], axis=0)
+    columns = np.arange(estimates.shape[1])
+    percentiles = []
+    for position in np.asarray(q, dtype=np.float64) / 100.0 * (n - 1):
+        k = int(np.floor(position))
+        below = ordered[(ends <= k).sum(axis=0), columns]
+        above = ordered[(ends <= min(k + 1, n - 1)).sum(axis=0), columns]
+        percentiles.append(below + (above - below) * (position - k))
+    return percentiles
+
+
+def aggregate(series, percentiles=(5, 95), resamples=RESAMPLES, confidence=95, seed=0):
+    """
+    Aggregate the repeated runs @series (a list of 1-D arrays) of a configuration, sample by sample.
+
+    :return: a dict of arrays (see SERIES_STATS): the mean and median of the runs, the @percentiles of the runs
+    (low and high), the bootstrap confidence interval of the mean (ci_low and ci_high) and the number of runs
+    """
+    rows = series_stats._pad(series)
+    # np.nanpercentile goes column by column, so take the percentiles of the columns with the same number of runs
+    # together (NaN sorts last, so the r runs that have a sample are the first r rows of its column)
+    ordered = np.sort(rows, axis=0)
+    counts = (~np.isnan(ordered)).sum(axis=0)
+    low = np.full(rows.shape[1], np.nan)
+    high = np.full(rows.shape[1], np.nan)
+    for runs in np.unique(counts[counts > 0]).tolist():
+        columns = np.flatnonzero(counts == runs)
+        low[columns], high[columns] = np.percentile(ordered[:runs, columns], percentiles, axis=0)
+    ci_low, ci_high = bootstrap(rows, 'mean', resamples, confidence, seed)
+    return dict(mean=np.nanmean(rows, axis=0), median=np.nanmedian(rows, axis=0), low=low, high=high,
+                ci_low=ci_low, ci_high=ci_high, runs=counts.astype(np.float64))
+
+
+def aggregate_series(groups, percentiles=(5, 95), resamples=RESAMPLES, confidence=95, seed=0):
+    """aggregate every group of repeated series found by group_runs. Return a list of (name, params, aggregate dict)."""
+    return [(name, params, aggregate([series_cache.load(fp, float) for fp in filepaths], percentiles, resamples, confidence, seed))
+            for name, params, filepaths in groups]
+
+
+def aggregate_results(groups, resamples=RESAMPLES, confidence=95, seed=0):
+    """
+    Pick the best threshold of every repeated stats file of @groups (see group_runs) and aggregate the runs of each
+    configuration.
+
+    :return: a list of (name, params, dict that maps each metric of sweep.METRICS to (mean, ci_low, ci_high), and
+    'runs' to the number of runs with a result)
+    """
+    best = prepare.best_results_batch([fp for _, _, filepaths in groups for fp in filepaths])
+    # one row per run and one column per configuration, for each metric
+    rows = np.full((len(sweep.METRICS), max([len(filepaths) for _, _, filepaths in groups] + [1]), len(groups)), np.nan)
+    pos = 0
+    for column, (_, _, filepaths) in enumerate(groups):
+        for row in range(len(filepaths)):
+            rows[:, row, column] = [np.nan if value is None else value for value in best[pos][:len(sweep.METRICS)]]
+            pos += 1
+    results = [(name, params, dict()) for name, params, _ in groups]
+    for m, metric in enumerate(sweep.METRICS):
+        with np.errstate(invalid='ignore'):
+            means = np.nanmean(rows[m], axis=0) if len(groups) else []
+        ci_low, ci_high = bootstrap(rows[m], 'mean', resamples, confidence, seed)
+        for column, (_, _, result) in enumerate(results):
+            result[metric] = (float(means[column]), float(ci_low[column]), float(ci_high[column]))
+    for column, (_, _, result) in enumerate(results):
+        result['runs'] = int((~np.isnan(rows[0, :, column])).sum())
+    return results
+
+
+def write_series(results, folder):
+    """
+    Write each statistic of each aggregate of @results (see aggregate_series) to
+    `@folder/<configuration>.<statistic>.txt`, one value per line.
+    """
+    os.makedirs(folder, exist_ok=True)
+    for name, _, stats in results:
+        stem = os.path.splitext(name)[0]
+        for key in SERIES_STATS:
+            with open(os.path.join(folder, '{}.{}.txt'.format(stem, key.replace('_', '-'))), 'w') as f:
+                f.write(''.join(str(float(value)) + '\n' for value in stats[key]))
+
+
+def write_results(results, filepath):
+    """Write @results (see aggregate_results) to the CSV file @filepath, one row per configuration."""
+    param_keys = sorted(set(k for _, params, _ in results for k in params))
+    with open(filepath, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(['configuration'] + param_keys + ['runs'] +
+                        ['{}_{}'.format(metric, key) for metric in sweep.METRICS for key in ('mean', 'ci_low', 'ci_high')])
+        writer.writerows([name] + [params.get(k) for k in param_keys] + [result['runs']] +
+                         [value for metric in sweep.METRICS for value in result[metric]]
+                         for name, params, result in results)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Aggregate the repeated runs of every configuration, with bootstrap confidence intervals.')
+    parser.add_argument('-d', '--dir', help='folder(s) of the runs (e.g., one folder per repeat)', nargs='+', required=True)
+    parser.add_argument('-p', '--pattern', help='file name pattern of the runs', default='perf-*.txt')
+    parser.add_argument('-r', '--results', help='the runs are stats files: aggregate their best rates (see prepare.best_results)', action='store_true')
+    parser.add_argument('-n', '--resamples', help='number of bootstrap resamples', type=int, default=RESAMPLES)
+    parser.add_argument('-c', '--confidence', help='confidence level of the intervals in %%', type=float, default=95)
+    parser.add_argument('--percentiles', help='percentiles of the runs drawn as a band', type=float, nargs=2, default=[5, 95])
+    parser.add_argument('--seed', help='seed of the resampling', type=int, default=0)
+    parser.add_argument('-o', '--output', help='output folder of the aggregated series, or CSV file path of the aggregated results', required=True)
+    args = parser.parse_args()
+
+    groups = group_runs(args.dir, args.pattern)
+    if args.results:
+        write_results(aggregate_results(groups, args.resamples, args.confidence, args.seed), args.output)
+    else:
+        write_series(aggregate_series(groups, args.percentiles, args.resamples, args.confidence, args.seed), args.output)
@@ -0,0 +1,251 @@
+"""Put CPU, memory and throughput series on one clock and compute efficiency metrics from them.
+
+The experiment series are not sampled the same way: the CPU and memory series (`perf-wget-cpu-*.txt`,
+`perf-wget-mem-*.txt`) hold one sample per ps snapshot (every second), so their time is the sample index, while
+a speed run (`perf-wget-s-*.txt` with its `edge-<w>-<i>.txt`) holds the time at which each batch finished and the
+cumulative number of edges processed by then. This module resamples any (times, values) series onto a common
+clock, with vectorized
+- linear interpolation (interpolate), for quantities that change continuously, e.g., cumulative edges;
+- forward-fill (forward_fill), for quantities that hold until the next sample, e.g., the last memory reading;
+- bucket aggregation (bucket), for the sum, mean, max, ... of the samples that fall in each clock step,
+and joins the three series of a configuration (efficiency) to compare configurations by
+- CPU-seconds per 1,000 edges: the CPU time (summed over the cores) Unicorn spends on every 1,000 edges;
+- MB per sketch: the memory used per 1,000 elements of sketch (the `s` parameter of the run), i.e., how memory
+grows with the sketch size.
+"""
+import os
+import csv
+import glob
+import argparse
+import numpy as np
+import series_cache
+import sweep
+import lag
+
+# the resampling methods of align
+METHODS = ('interpolate', 'forward_fill', 'sum', 'mean', 'max', 'min', 'last', 'count')
+
+EFFICIENCY = ('duration', 'edges', 'edges_per_second', 'cpu_seconds', 'cpu_seconds_per_kedges',
+              'mean_mb', 'peak_mb', 'mb_per_sketch')
+
+
+def sample_times(n, interval=1.0, start=0.0):
+    """The times of @n samples taken every @interval seconds from @start, e.g., of a CPU or memory series."""
+    return start + interval * np.arange(n, dtype=np.float64)
+
+
+def clock(start, stop, step=1.0):
+    """A clock from @start to @stop (included if it falls on a step) ticking every @step seconds."""
+    return start + step * np.arange(int(np.floor((stop - start) / step + 1e-9)) + 1, dtype=np.float64)
+
+
+def interpolate(times, values, at, left=np.nan, right=np.nan):
+    """
+    Linearly interpolate the series (@times, @values) at the times @at.
+
+    :param left: the value before the first sample (e.g., 0 for cumulative counts)
+    :param right: the value after the last sample (e.g., values[-1] for cumulative counts)
+    """
+    return np.interp(at, times, values, left=left, right=right)
+
+
+def forward_fill(times, values, at, initial=np.nan):
+    """
+    The last value of the series (@times, @values) at or before each time of @at.
+
+    :param initial: the value before the first sample
+    """
+    values = np.asarray(values, dtype=np.float64)
+    index = np.searchsorted(times, at, side='right') - 1
+    filled = values[np.maximum(index, 0)] if len(values) else np.full(len(at), initial)
+    filled[index < 0] = initial
+    return filled
+
+
+def bucket(times, values, edges, how='mean'):
+    """
+    Aggregate the samples of the series (@times, @values) that fall in each bucket [edges[k], edges[k + 1]).
+
+    :param how: 'sum', 'mean', 'max', 'min', 'last' (the latest sample) or 'count'
+    :return: an array of len(@edges) - 1 values; empty buckets are NaN (0 for 'sum' and 'count')
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    n = len(edges) - 1
+    index = np.searchsorted(edges, times, side='right') - 1
+    inside = (index >= 0) & (index < n)
+    index, times, values = index[inside], times[inside], values[inside]
+    counts = np.bincount(index, minlength=n)
+    if how == 'count':
+        return counts.astype(np.float64)
+    if how in ('sum', 'mean'):
+        sums = np.bincount(index, weights=values, minlength=n)
+        if how == 'sum':
+            return sums
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    if how not in ('max', 'min', 'last'):
+        raise ValueError("unknown aggregation: {}".format(how))
+    aggregated = np.full(n, np.nan)
+    if not len(index):
+        return aggregated
+    # group the samples of each bucket together (in time order within a bucket), then reduce each group
+    order = np.lexsort((times, index))
+    index, values = index[order], values[order]
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    if how == 'last':
+        aggregated[index[starts]] = values[np.r_[starts[1:], len(values)] - 1]
+    else:
+        reduce = np.maximum if how == 'max' else np.minimum
+        aggregated[index[starts]] = reduce.reduceat(values, starts)
+    return aggregated
+
+
+def resample(times, values, at, method='interpolate', step=None):
+    """
+    Resample the series (@times, @values) on the clock @at with @method (see METHODS).
+    The aggregating methods summarize the samples of each step [at[k], at[k] + @step), @step being the
+    clock step by default.
+    """
+    if method == 'interpolate':
+        return interpolate(times, values, at)
+    if method == 'forward_fill':
+        return forward_fill(times, values, at)
+    if step is None:
+        step = at[1] - at[0] if len(at) > 1 else 1.0
+    return bucket(times, values, np.r_[at, at[-1] + step] if len(at) else at, method)
+
+
+def align(series, step=1.0, start=0.0, stop=None):
+    """
+    Put several series on one clock.
+
+    :param series: a dict that maps a name to (times, values, method), method being one of METHODS
+    :param stop: the end of the clock (default: the latest sample of all series)
+    :return: the clock and a dict that maps each name to its resampled values
+    """
+    if stop is None:
+        stop = max(float(times[-1]) for times, _, _ in series.values() if len(times))
+    at = clock(start, stop, step)
+    return at, dict((name, resample(times, values, at, method, step)) for name, (times, values, method) in series.items())
+
+
+def cpu_seconds(cpu, interval=1.0, cores=8):
+    """
+    The CPU time (in seconds, summed over all cores) of each sample of a CPU series.
+
+    :param cpu: the CPU usage averaged over @cores cores (in %) sampled every @interval seconds, as written by prepare-cpu-mem.py
+    """
+    return np.asarray(cpu, dtype=np.float64) / 100.0 * cores * interval
+
+
+def efficiency(cpu, mem, speed, interval=1.0, cores=8, sketch_size=None, step=1.0):
+    """
+    Join the CPU series @cpu, the memory series @mem (in MB, both sampled every @interval seconds) and the speed
+    run @speed (times, cumulative edges, see lag.load_run) of one configuration, all starting at time 0.
+
+    :param sketch_size: the sketch size of the configuration, for mb_per_sketch (NaN if None)
+    :return: a dict of the summary numbers (see EFFICIENCY) and of the series on the common clock: time, cpu (%)
+    and mem (MB) (NaN once their run is over), edges_processed (cumulative), throughput (edges/second over each
+    step) and running_cpu_seconds_per_kedges (CPU-seconds so far per 1,000 edges processed so far)
+    """
+    cpu = np.asarray(cpu, dtype=np.float64)
+    mem = np.asarray(mem, dtype=np.float64)
+    times, edges = speed
+    at, aligned = align(dict(
+        cpu=(sample_times(len(cpu), interval), cpu, 'forward_fill'),
+        mem=(sample_times(len(mem), interval), mem, 'forward_fill'),
+    ), step, stop=max(len(cpu) * interval, len(mem) * interval, times[-1] if len(times) else 0.0))
+    # nothing is processed before the first batch, and the total stays flat after the last one
+    processed = interpolate(times, edges, at, left=0.0, right=edges[-1] if len(edges) else 0.0)
+    for name, samples in (('cpu', cpu), ('mem', mem)):
+        aligned[name][at >= len(samples) * interval] = np.nan
+    used = bucket(sample_times(len(cpu), interval), cpu_seconds(cpu, interval, cores), np.r_[at, at[-1] + step], 'sum')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        running = np.where(processed > 0, np.cumsum(used) / processed * 1000.0, np.nan)
+
+    # the runs measure the same workload, so the totals are compared over the whole of each series
+    total_edges = float(edges[-1]) if len(edges) else 0.0
+    duration = float(times[-1]) if len(times) else 0.0
+    total_cpu = float(cpu_seconds(cpu, interval, cores).sum())
+    peak_mb = float(np.max(mem)) if len(mem) else float('nan')
+    return dict(
+        duration=duration,
+        edges=total_edges,
+        edges_per_second=total_edges / duration if duration > 0 else float('nan'),
+        cpu_seconds=total_cpu,
+        cpu_seconds_per_kedges=total_cpu / total_edges * 1000.0 if total_edges > 0 else float('nan'),
+        mean_mb=float(np.mean(mem)) if len(mem) else float('nan'),
+        peak_mb=peak_mb,
+        mb_per_sketch=peak_mb / sketch_size * 1000.0 if sketch_size else float('nan'),
+        time=at,
+        cpu=aligned['cpu'],
+        mem=aligned['mem'],
+        edges_processed=processed,
+        throughput=np.r_[np.diff(processed) / step, 0.0] if len(at) else processed,
+        running_cpu_seconds_per_kedges=running,
+    )
+
+
+def find_configurations(data_folder, system='unicorn', prefix='perf-wget'):
+    """
+    Find the configurations with a CPU series, a memory series and a speed run in the sweep folders of
+    @data_folder (`perf_cpu_*_<system>`, `perf_mem_*_<system>` and `perf_speed_*_<system>`), matched by sweep
+    name and parameters.
+
+    :return: a list of (sweep name, params, CPU file path, memory file path, time file path, edge file path)
+    """
+    configurations = []
+    for cpu_folder in sorted(glob.glob(os.path.join(data_folder, 'perf_cpu_*_{}'.format(system)))):
+        name = os.path.basename(cpu_folder)[len('perf_cpu_'):-len(system) - 1]
+        mem_folder = os.path.join(data_folder, 'perf_mem_{}_{}'.format(name, system))
+        speed_runs = dict((tuple(sorted(params.items())), (time_fp, edge_fp))
+                          for params, time_fp, edge_fp in lag.find_runs(os.path.join(data_folder, 'perf_speed_{}_{}'.format(name, system))))
+        for params, cpu_filepath in sweep.discover(cpu_folder, '{}-cpu-*.txt'.format(prefix)):
+            mem_filepath = os.path.join(mem_folder, os.path.basename(cpu_filepath).replace('-cpu-', '-mem-', 1))
+            key = tuple(sorted(params.items()))
+            if os.path.exists(mem_filepath) and key in speed_runs:
+                configurations.append((name, params) + (cpu_filepath, mem_filepath) + speed_runs[key])
+    return configurations
+
+
+def compare(configurations, interval=1.0, cores=8, step=1.0):
+    """
+    Compute the efficiency of each configuration found by find_configurations.
+
+    :return: a list of (sweep name, params, summary dict of EFFICIENCY)
+    """
+    results = []
+    for name, params, cpu_filepath, mem_filepath, time_filepath, edge_filepath in configurations:
+        result = efficiency(series_cache.load(cpu_filepath, float), series_cache.load(mem_filepath, float),
+                            lag.load_run(time_filepath, edge_filepath), interval, cores, params.get('s'), step)
+        results.append((name, params, dict((k, result[k]) for k in EFFICIENCY)))
+    return results
+
+
+def _label(params):
+    return '-'.join('{}-{}'.format(k, params[k]) for k in ('s', 'h', 'w', 'i') if k in params)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Join the CPU, memory and speed series of every configuration on one clock and compare their efficiency.')
+    parser.add_argument('-d', '--data', help='data folder holding the perf_cpu_*, perf_mem_* and perf_speed_* sweep folders', default='../data')
+    parser.add_argument('--system', help='system whose runs are compared', default='unicorn')
+    parser.add_argument('-c', '--cores', help='number of cores of the machine the CPU series were recorded on', type=int, default=8)
+    parser.add_argument('--interval', help='sampling interval of the CPU and memory series in seconds', type=float, default=1.0)
+    parser.add_argument('-s', '--step', help='resolution of the common clock in seconds', type=float, default=1.0)
+    parser.add_argument('-o', '--output', help='output CSV file path (default: print a table)')
+    args = parser.parse_args()
+
+    results = compare(find_configurations(args.data, args.system), args.interval, args.cores, args.step)
+    rows = [[name, _label(params)] + [summary[k] for k in EFFICIENCY] for name, params, summary in results]
+    if args.output:
+        with open(args.output, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(('sweep', 'configuration') + EFFICIENCY)
+            writer.writerows(rows)
+    else:
+        print('{:<10} {:<26} {:>8} {:>8} {:>16} {:>11} {:>22} {:>8} {:>8} {:>13}'.format('sweep', 'configuration', *EFFICIENCY))
+        for row in rows:
+            print('{:<10} {:<26} {:>8.0f} {:>8.0f} {:>16.1f} {:>11.1f} {:>22.3f} {:>8.1f} {:>8.1f} {:>13.1f}'.format(*row))
@@ -0,0 +1,192 @@
+"""Extract structured records from Unicorn detector logs.
+
+The detector logs (`results-*.txt` of the parameter sweeps, the DARPA, StreamSpot and CamFlowCI logs) mix
+progress messages with evaluation results, e.g.,
+Sketch shape: (173, 2000)
+check sketch # 796 with smaller length (1904) than required (2000)
+Model 8 is done!
+Best Configuration:
+Threshold metric: max
+Number of standard deviations: 1.3
+Test accuracy: 0.75
+Test Precision: 0.625
+Test Recall: 1.0
+Test F-1 Score: 0.769230769231
+Results:
+This graph: sketch-attack-0.txt is considered ABNORMAL at 4
+This graph: sketch-benign-12.txt is considered NORMAL (7/375).
+
+A log is scanned once, line by line, by a generator pipeline (lines -> records -> columns), so logs of any
+size are processed in constant memory apart from the extracted columns, which are kept in compact typed
+arrays and saved as a NumPy `.npz` store.
+"""
+import re
+import argparse
+from array import array
+import numpy as np
+import datafile
+
+BUFFER_SIZE = 1 << 20
+
+GRAPH_RE = re.compile(r'This graph: sketch-([\w.]+?)-(\d+)\.txt is considered (?:ABNORMAL at (\d+)|NORMAL \((\d+)/(\d+)\))')
+# the sketch array is 1-D, e.g., (0,), when there are no sketches
+SHAPE_RE = re.compile(r'Sketch shape: \((\d+),\s*(\d*)\)')
+CHECK_RE = re.compile(r'check sketch # (\d+) with smaller length \((\d+)\) than required \((\d+)\)')
+ZEROS_RE = re.compile(r'sketch # (\d+) contains only 0s')
+MODEL_RE = re.compile(r'Model (\d+) is done!')
+CONFIG_RE = re.compile(r'(Threshold metric|Number of standard deviations|Test accuracy|Test Precision|Test Recall|Test F-1 Score): (\S+)')
+
+CONFIG_FIELDS = {
+    'Threshold metric': 'metric',
+    'Number of standard deviations': 'std',
+    'Test accuracy': 'accuracy',
+    'Test Precision': 'precision',
+    'Test Recall': 'recall',
+    'Test F-1 Score': 'f_measure',
+}
+RATES = ('std', 'accuracy', 'precision', 'recall', 'f_measure')
+
+
+def read_lines(filepath):
+    """Lines of @filepath (possibly compressed, see datafile), without line endings."""
+    with datafile.open_input(filepath, buffering=BUFFER_SIZE) as f:
+        for line in f:
+            yield line.rstrip('\n')
+
+
+def scan(lines):
+    """
+    Turn the log @lines into records (tuples whose first item is the record kind):
+    ('shape', rows, columns) (columns is -1 for a 1-D shape, e.g., (0,)), ('check', sketch, length, required), ('zeros', sketch), ('model', model),
+    ('trying',) at the start of each threshold search (i.e., each cross-validation fold),
+    ('config', best, metric, std, accuracy, precision, recall, f_measure) for each evaluated threshold configuration
+    (rates are None when the log says so), and ('graph', label, graph, abnormal, score, total) for each test graph,
+    where @score is the anomaly score (ABNORMAL) or the number of abnormal sketches out of @total (NORMAL).
+    """
+    best = False
+    config = dict()
+    for line in lines:
+        if line.startswith('This graph'):
+            m = GRAPH_RE.match(line)
+            if m:
+                label, graph, abnormal_at, normal, total = m.groups()
+                if abnormal_at is not None:
+                    yield ('graph', label, int(graph), True, int(abnormal_at), -1)
+                else:
+                    yield ('graph', label, int(graph), False, int(normal), int(total))
+        elif line.startswith('Sketch shape'):
+            m = SHAPE_RE.match(line)
+            if m:
+                yield ('shape', int(m.group(1)), int(m.group(2)) if m.group(2) else -1)
+        elif line.startswith('Model'):
+            m = MODEL_RE.match(line)
+            if m:
+                yield ('model', int(m.group(1)))
+        elif line.startswith('Threshold metric') or line.startswith('Number of') or line.startswith('Test'):
+            m = CONFIG_RE.match(line)
+            if m:
+                config[CONFIG_FIELDS[m.group(1)]] = m.group(2)
+        elif line.startswith('Results'):
+            rates = [None if config.get(k, 'None') == 'None' else float(config[k]) for k in RATES]
+            yield tuple(['config', best, config.get('metric')] + rates)
+            best = False
+            config = dict()
+        elif line.startswith('Best Configuration'):
+            best = True
+        elif line.startswith('Trying'):
+            yield ('trying',)
+        elif line.startswith('check sketch'):
+            m = CHECK_RE.match(line)
+            if m:
+                yield ('check', int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        elif line.startswith('sketch #'):
+            m = ZEROS_RE.match(line)
+            if m:
+                yield ('zeros', int(m.group(1)))
+
+
+class ResultsStore(object):
+    """
+    Columnar store of the records of one or more logs.
+    Test graphs refer to the configuration (row of the config table) they were evaluated with, or -1 if the log does not say.
+    """
+
+    TABLES = {
+        'graph': (('source', 'l'), ('config', 'l'), ('label', 'l'), ('graph', 'l'), ('abnormal', 'b'), ('score', 'l'), ('total', 'l')),
+        'config': (('source', 'l'), ('fold', 'l'), ('best', 'b'), ('metric', 'l'), ('std', 'd'), ('accuracy', 'd'), ('precision', 'd'), ('recall', 'd'), ('f_measure', 'd')),
+        'shape': (('source', 'l'), ('rows', 'l'), ('columns', 'l')),
+        'check': (('source', 'l'), ('sketch', 'l'), ('length', 'l'), ('required', 'l')),
+        'zeros': (('source', 'l'), ('sketch', 'l')),
+        'model': (('source', 'l'), ('model', 'l')),
+    }
+
+    def __init__(self):
+        self.columns = dict((table, dict((name, array(typecode)) for name, typecode in fields))
+                            for table, fields in self.TABLES.items())
+        self.sources = []
+        self.labels = []
+        self.metrics = []
+
+    def _code(self, names, name):
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def _append(self, table, values):
+        for (name, _), value in zip(self.TABLES[table], values):
+            self.columns[table][name].append(value)
+
+    def add(self, records, source):
+        """Consume the @records (see scan) of the log @source."""
+        src = self._code(self.sources, source)
+        fold = -1
+        config = -1
+        for record in records:
+            kind = record[0]
+            if kind == 'graph':
+                _, label, graph, abnormal, score, total = record
+                self._append('graph', (src, config, self._code(self.labels, label), graph, abnormal, score, total))
+            elif kind == 'config':
+                best, metric, rates = record[1], record[2], record[3:]
+                rates = [float('nan') if rate is None else rate for rate in rates]
+                self._append('config', [src, fold, best, self._code(self.metrics, metric or '')] + rates)
+                config = len(self.columns['config']['fold']) - 1
+            elif kind == 'trying':
+                fold += 1
+            else:
+                self._append(kind, (src,) + record[1:])
+        return self
+
+    def table(self, name):
+        """The columns of the table @name as a dict of NumPy arrays."""
+        return dict((column, np.frombuffer(values, dtype=values.typecode) if len(values) else np.array([], dtype=values.typecode))
+                    for column, values in self.columns[name].items())
+
+    def save(self, filepath):
+        """Save all tables to the .npz file @filepath (columns are named <table>.<column>)."""
+        arrays = dict(sources=np.array(self.sources), labels=np.array(self.labels), metrics=np.array(self.metrics))
+        for table in self.TABLES:
+            for column, values in self.table(table).items():
+                arrays['{}.{}'.format(table, column)] = values
+        np.savez_compressed(filepath, **arrays)
+
+
+def scan_files(filepaths):
+    """Scan the logs @filepaths into a single ResultsStore."""
+    store = ResultsStore()
+    for filepath in filepaths:
+        store.add(scan(read_lines(filepath)), filepath)
+    return store
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Extract structured records from Unicorn detector logs.')
+    parser.add_argument('-i', '--input', help='input log file paths', nargs='+', required=True)
+    parser.add_argument('-o', '--output', help='output .npz file path', required=True)
+    args = parser.parse_args()
+
+    store = scan_files(args.input)
+    store.save(args.output)
+    for table in ResultsStore.TABLES:
+        print("{}: {} records".format(table, len(store.columns[table]['source'])))
@@ -0,0 +1,192 @@
+"""Binary cache of the one-value-per-line data files that plot.py reads.
+
+The first time a text series is loaded, it is parsed once and saved as a NumPy `.npy` sidecar next to it
+(e.g., `edge-1000-6000.txt.npy`), together with a small `.key` file that records the source's mtime, size
+and SHA-1 hash. Later loads memory-map the sidecar instead of parsing the text again. A sidecar is stale
+when the source's size or hash no longer matches, in which case the source is parsed again; a changed mtime
+alone only triggers a re-hash. Within one process, every path is loaded at most once.
+
+Text is parsed in a single pass by NumPy's C parser, reading the file itself (no Python object per value). A file
+with malformed lines (e.g., a truncated last line or a stray log message) is parsed again line by line: its
+malformed lines are read as NaN, so that the later samples of a series indexed by time (e.g., CPU sample k taken at
+second k) keep their position, and reported with a warning instead of failing the whole load. The report is kept in
+the `.key` file, so every load of the series warns again, not only the one that parsed it.
+"""
+import os
+import json
+import hashlib
+import warnings
+import numpy as np
+import datafile
+import profiling
+
+SIDECAR_SUFFIX = '.npy'
+KEY_SUFFIX = '.npy.key'
+
+_loaded = dict()
+
+
+def file_hash(filepath):
+    """SHA-1 hex digest of the content of @filepath."""
+    h = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def parse_lines(filepath, dtype=float, strict=False):
+    """
+    Parse the text series @filepath (possibly compressed) line by line, reading the malformed lines as NaN.
+    Blank lines and comments (from '#') are skipped, as np.loadtxt does, unless @strict, in which case they are
+    malformed too.
+
+    :return: the array of @dtype of the values (float64 if @dtype is an integer type and a line is malformed, as
+    NaN is not an integer) and a list of (line number, line) of the malformed lines
+    """
+    convert = np.dtype(dtype).type
+    values = []
+    malformed = []
+    with datafile.open_input(filepath) as f:
+        for lineno, line in enumerate(f, 1):
+            text = line.strip() if strict else line.split('#', 1)[0].strip()
+            if not text and not strict:
+                continue
+            try:
+                values.append(convert(text))
+            except (ValueError, OverflowError):
+                malformed.append((lineno, line.rstrip('\n')))
+                values.append(None)
+    if not malformed:
+        return np.array(values, dtype=dtype), malformed
+    if not np.issubdtype(np.dtype(dtype), np.inexact):
+        dtype = np.float64
+    return np.array([np.nan if value is None else value for value in values], dtype=dtype), malformed
+
+
+def _count_lines(filepath):
+    with datafile.open_input(filepath, 'rb') as f:
+        count = 0
+        last = b'\n'
+        for block in iter(lambda: f.read(1 << 20), b''):
+            count += block.count(b'\n')
+            last = block[-1:]
+    return count + (last != b'\n')
+
+
+def read_series(filepath, dtype=float, strict=False):
+    """
+    Parse the text series @filepath (one value per line, possibly compressed) into an array of @dtype in one
+    native pass; only if a line is malformed, parse it again line by line (see parse_lines).
+
+    :param strict: blank lines and comments are malformed too (np.loadtxt skips them)
+    :return: the array of the values, NaN for the malformed lines, and a list of (line number, line) of the
+    malformed lines
+    """
+    comments = None if strict else '#'
+    try:
+        if datafile.detect(filepath) is None:
+            # NumPy reads an uncompressed file by itself, which is faster than feeding it a Python file object
+            values = np.loadtxt(filepath, dtype=dtype, ndmin=1, comments=comments)
+        else:
+            with datafile.open_input(filepath) as f:
+                values = np.loadtxt(f, dtype=dtype, ndmin=1, comments=comments)
+    except ValueError:
+        return parse_lines(filepath, dtype, strict)
+    if strict and len(values) != _count_lines(filepath):
+        # np.loadtxt skipped blank lines
+        return parse_lines(filepath, dtype, strict)
+    return values, []
+
+
+def _warn_malformed(filepath, count, rows):
+    warnings.warn("{}: read {} malformed line(s) as NaN: {}".format(
+        filepath, count, ', '.join('{}: {!r}'.format(*row) for row in rows) + (', ...' if count > len(rows) else '')),
+        stacklevel=3)
+
+
+def parse(filepath, dtype):
+    """Parse the text series @filepath into an array of @dtype (see read_series), warning about malformed lines."""
+    values, malformed = read_series(filepath, dtype)
+    if malformed:
+        _warn_malformed(filepath, len(malformed), malformed[:5])
+    return values
+
+
+def _read_key(key_path):
+    try:
+        with open(key_path, 'r') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def write_atomic(path, write):
+    """Write @path with @write (called with the file opened in binary mode) to a temporary file, then move it in place, so readers never see a partial file."""
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _write_key(key_path, key):
+    write_atomic(key_path, lambda f: f.write(json.dumps(key).encode('utf-8')))
+
+
+def load(filepath, dtype=float):
+    """
+    Load the text series @filepath as a (read-only) array of @dtype, using its binary sidecar when it is fresh.
+
+    :param filepath: the text data file path
+    :param dtype: the type of the values, e.g., int or float
+    :return: a NumPy array, memory-mapped from the sidecar whenever possible
+    """
+    dtype = np.dtype(dtype)
+    memo_key = (os.path.abspath(filepath), dtype.str)
+    if memo_key in _loaded:
+        return _loaded[memo_key]
+
+    sidecar_path = filepath + SIDECAR_SUFFIX
+    key_path = filepath + KEY_SUFFIX
+    stat = os.stat(filepath)
+    key = _read_key(key_path)
+    fresh = False
+    # (keys without a malformed-line report are from before malformed lines were read as NaN)
+    if key is not None and key.get('dtype') == dtype.str and key.get('size') == stat.st_size \
+            and 'malformed' in key and os.path.exists(sidecar_path):
+        if key.get('mtime') == stat.st_mtime_ns:
+            fresh = True
+        else:
+            # Touched (e.g., by a checkout) but possibly unchanged.
+            digest = file_hash(filepath)
+            fresh = key.get('sha1') == digest
+            if fresh:
+                key['mtime'] = stat.st_mtime_ns
+                _write_key(key_path, key)
+
+    if fresh:
+        data = np.load(sidecar_path, mmap_mode='r')
+        if key.get('malformed'):
+            _warn_malformed(filepath, key['malformed'], [tuple(row) for row in key.get('malformed_lines', [])])
+    else:
+        with profiling.stage('parse', filepath):
+            data, malformed = read_series(filepath, dtype)
+        if malformed:
+            _warn_malformed(filepath, len(malformed), malformed[:5])
+        data.setflags(write=False)
+        key = dict(mtime=stat.st_mtime_ns, size=stat.st_size, sha1=file_hash(filepath), dtype=dtype.str,
+                   malformed=len(malformed), malformed_lines=malformed[:5])
+        try:
+            write_atomic(sidecar_path, lambda f: np.save(f, data))
+            _write_key(key_path, key)
+        except (IOError, OSError):
+            # Read-only data directory: keep the parsed array for this process only.
+            pass
+
+    _loaded[memo_key] = data
+    return data
+
+
+def clear():
+    """Forget the series loaded by this process (the sidecars on disk are kept)."""
+    _loaded.clear()
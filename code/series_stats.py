@@ -0,0 +1,183 @@
+"""Summary statistics of CPU and memory usage series.
+
+Hosts are sized on tail CPU usage and peak memory, so besides the mean we compute the median, the 95th and
+99th percentiles, the maximum, the standard deviation and the time spent above a threshold (e.g., 90% CPU).
+The statistics can be computed over a whole series, over rolling or tumbling windows of it, or over every
+series of a sweep at once. Everything is vectorized: series are laid out as rows of a NaN-padded 2-D array
+and each statistic is a single (NaN-aware if there is any NaN) NumPy reduction along the rows. Rolling windows are
+reduced a chunk of windows at a time, so memory does not grow with the number of windows times their size.
+"""
+import os
+import csv
+import argparse
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import series_cache
+import sweep
+
+# the number of samples of the rolling windows reduced at a time (the reductions copy their windows)
+CHUNK = 1 << 20
+
+STATS = ('samples', 'mean', 'median', 'p95', 'p99', 'max', 'std', 'above', 'above_fraction')
+
+
+def _pad(series):
+    """Lay the @series out as the rows of a 2-D float array, padding the shorter ones with NaN."""
+    rows = np.full((len(series), max([len(s) for s in series] + [1])), np.nan)
+    for row, values in zip(rows, series):
+        row[:len(values)] = values
+    return rows
+
+
+def _reduce(rows, threshold=None, interval=1.0):
+    """
+    The statistics (see STATS) of every row of the 2-D array @rows, ignoring NaN.
+    Rows without any sample get NaN statistics.
+
+    :param threshold: samples strictly above it count towards @above; None to skip
+    :param interval: the time between two samples (in seconds), so that @above is a duration
+    :return: a dict of 1-D arrays, one value per row
+    """
+    rows = np.asarray(rows, dtype=np.float64)
+    valid = ~np.isnan(rows)
+    samples = valid.sum(axis=1)
+    empty = samples == 0
+    # reductions of all-NaN rows warn; compute them on a dummy value and mask them afterwards
+    filled = np.where(empty[:, None], 0.0, rows) if empty.any() else rows
+    # without NaN, the plain reductions give the same results about twice as fast
+    nan_aware = not valid.all()
+    median, p95, p99 = (np.nanpercentile if nan_aware else np.percentile)(filled, (50, 95, 99), axis=1)
+    stats = dict(
+        samples=samples,
+        mean=(np.nanmean if nan_aware else np.mean)(filled, axis=1),
+        median=median,
+        p95=p95,
+        p99=p99,
+        max=(np.nanmax if nan_aware else np.max)(filled, axis=1),
+        std=(np.nanstd if nan_aware else np.std)(filled, axis=1),
+    )
+    if threshold is not None:
+        above = (rows > threshold).sum(axis=1)
+        stats['above'] = above * interval
+        stats['above_fraction'] = above / np.maximum(samples, 1)
+    else:
+        stats['above'] = np.full(len(rows), np.nan)
+        stats['above_fraction'] = np.full(len(rows), np.nan)
+    for name in STATS[1:]:
+        stats[name][empty] = np.nan
+    return stats
+
+
+def summarize(values, threshold=None, interval=1.0):
+    """
+    The statistics (see STATS) of the series @values, as a dict of floats.
+    See _reduce for @threshold and @interval.
+    """
+    return dict((name, column[0].item()) for name, column in _reduce(_pad([values]), threshold, interval).items())
+
+
+def summarize_many(series, threshold=None, interval=1.0):
+    """The statistics of each of the @series (of any lengths) in one pass, as a dict of 1-D arrays (one value per series)."""
+    return _reduce(_pad(series), threshold, interval)
+
+
+def tumbling(values, size, threshold=None, interval=1.0):
+    """
+    The statistics of the consecutive, non-overlapping windows of @size samples of @values (the last one may be shorter).
+
+    :return: a dict of 1-D arrays, one value per window
+    """
+    values = np.asarray(values, dtype=np.float64)
+    num_windows = -(-len(values) // size)
+    rows = np.full(num_windows * size, np.nan)
+    rows[:len(values)] = values
+    return _reduce(rows.reshape(num_windows, size), threshold, interval)
+
+
+def rolling(values, size, threshold=None, interval=1.0, step=1):
+    """
+    The statistics of the windows of @size samples of @values starting every @step samples.
+    Window i covers samples [i * @step, i * @step + @size).
+
+    :return: a dict of 1-D arrays, one value per window
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < size:
+        return _reduce(_pad([values]), threshold, interval)
+    windows = sliding_window_view(values, size)[::step]
+    # the windows overlap in the view, but not in the copies the reductions make of them, so reduce a chunk of
+    # windows at a time to keep memory in O(len(@values) + CHUNK)
+    rows = max(1, CHUNK // size)
+    chunks = [_reduce(windows[start:start + rows], threshold, interval) for start in range(0, len(windows), rows)]
+    return dict((name, np.concatenate([chunk[name] for chunk in chunks])) for name in chunks[0])
+
+
+def summarize_sweep(folders, pattern='perf-*.txt', threshold=None, interval=1.0):
+    """
+    Summarize every series matching @pattern in @folders (see sweep.discover) with a single vectorized pass.
+
+    :return: a list of (params, filepath, stats dict of floats), in the order of the folders and parameters
+    """
+    runs = [run for folder in folders for run in sweep.discover(folder, pattern)]
+    stats = summarize_many([series_cache.load(fp, float) for _, fp in runs], threshold, interval)
+    return [(params, fp, dict((name, stats[name][pos].item()) for name in STATS)) for pos, (params, fp) in enumerate(runs)]
+
+
+def write_table(results, filepath):
+    """Write the @results of summarize_sweep as a CSV table with one row per series."""
+    with open(filepath, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(('file',) + STATS)
+        for _, fp, stats in results:
+            writer.writerow([os.path.basename(fp)] + [stats[name] for name in STATS])
+
+
+def print_table(results):
+    """Print the @results of summarize_sweep as a table with one row per series."""
+    print('{:<50} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>7}'.format('file', *STATS))
+    for _, fp, stats in results:
+        print('{:<50} {:>7} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.1f} {:>7.3f}'.format(
+            os.path.basename(fp), *[stats[name] for name in STATS]))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Summary statistics (mean, median, p95, p99, max, std, time above a threshold) of CPU or memory series.')
+    parser.add_argument('-i', '--input', help='series file path(s)', nargs='+')
+    parser.add_argument('-d', '--dir', help='sweep folder(s); every file matching --pattern is summarized', nargs='+')
+    parser.add_argument('-p', '--pattern', help='file name pattern within the sweep folders', default='perf-*.txt')
+    parser.add_argument('-t', '--threshold', help='report the time spent strictly above this value', type=float)
+    parser.add_argument('--interval', help='time between two samples in seconds', type=float, default=1.0)
+    parser.add_argument('--tumbling', help='summarize consecutive windows of this many samples (single input only)', type=int)
+    parser.add_argument('--rolling', help='summarize rolling windows of this many samples (single input only)', type=int)
+    parser.add_argument('--step', help='step between two rolling windows, in samples', type=int, default=1)
+    parser.add_argument('-o', '--output', help='output CSV file path (default: print a table)')
+    args = parser.parse_args()
+
+    if not args.input and not args.dir:
+        parser.error('give input files (-i) or sweep folders (-d)')
+    if args.tumbling or args.rolling:
+        if not args.input or len(args.input) != 1:
+            parser.error('windows are computed over a single input file')
+        values = series_cache.load(args.input[0], float)
+        if args.tumbling:
+            stats = tumbling(values, args.tumbling, args.threshold, args.interval)
+        else:
+            stats = rolling(values, args.rolling, args.threshold, args.interval, args.step)
+        # one row per window, named by the samples it covers
+        size = args.tumbling or args.rolling
+        step = size if args.tumbling else args.step
+        results = [(dict(), '{}-{}'.format(pos * step, pos * step + size), dict((name, stats[name][pos].item()) for name in STATS))
+                   for pos in range(len(stats['samples']))]
+    else:
+        results = []
+        if args.input:
+            stats = summarize_many([series_cache.load(fp, float) for fp in args.input], args.threshold, args.interval)
+            results += [(sweep.parse_params(fp), fp, dict((name, stats[name][pos].item()) for name in STATS)) for pos, fp in enumerate(args.input)]
+        if args.dir:
+            results += summarize_sweep(args.dir, args.pattern, args.threshold, args.interval)
+
+    if args.output:
+        write_table(results, args.output)
+    else:
+        print_table(results)
@@ -0,0 +1,308 @@
+"""Read the experiment results straight out of the .xlsx workbooks.
+
+The workbooks (e.g., `data/param_hop_camflow_subset/hop_sheet.xlsx` or `data/DARPA/cadets.xlsx`) are made of
+blocks, one per setting of the experiment, e.g.,
+
+Hop        1
+           1      2      3      4      5      Average
+Accuracy   0.67   0.75   0.5    0.83   0.58   0.67
+Precision  ...
+Recall     ...
+F Score    ...
+
+i.e., a setting row (a label and a value, or a single label such as "Mean 2.6"), a row of cross-validation
+folds ending with "Average", and one row per metric. Blocks may sit next to each other, or below each other
+separated by an empty row.
+
+An .xlsx file is a zip archive of XML documents. The sheet is streamed out of the archive with iterparse and
+each row is discarded once read, so memory does not grow with the workbook. The blocks are cached in a JSON
+sidecar next to the workbook (e.g., `hop_sheet.xlsx.blocks.json`) keyed on its size and SHA-1 hash (the hash is
+only recomputed when the mtime changes), so a workbook is parsed once until it changes.
+"""
+import os
+import re
+import json
+import zipfile
+import argparse
+import warnings
+import xml.etree.ElementTree as ET
+import numpy as np
+import series_cache
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+CELL_RE = re.compile(r'([A-Z]+)(\d+)')
+SIDECAR_SUFFIX = '.blocks.json'
+# cells that mean "no value", e.g., the precision of a run without any positive prediction
+MISSING = ('N/A', 'NA', '#DIV/0!', '')
+
+_loaded = dict()
+
+
+def column_index(letters):
+    """The 0-based index of the column @letters, e.g., 0 for 'A' and 26 for 'AA'."""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def column_letters(index):
+    """The letters of the 0-based column @index, e.g., 'A' for 0 and 'AA' for 26 (see column_index)."""
+    letters = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(ord('A') + rest) + letters
+    return letters
+
+
+def metric_name(label):
+    """The normalized name of a metric row label, e.g., 'f_score' for 'F Score' or 'F-Score'."""
+    return re.sub(r'[^a-z0-9]+', '_', label.strip().lower()).strip('_')
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == MAIN_NS + 'si':
+                strings.append(''.join(t.text or '' for t in elem.iter(MAIN_NS + 't')))
+                elem.clear()
+    return strings
+
+
+def _sheets(archive):
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    return [(elem.get('name'), elem.get(REL_NS + 'id')) for elem in workbook.iter(MAIN_NS + 'sheet')]
+
+
+def sheet_names(filepath):
+    """The names of the worksheets of the workbook @filepath, in order."""
+    with zipfile.ZipFile(filepath) as archive:
+        return [name for name, _ in _sheets(archive)]
+
+
+def _sheet_member(archive, sheet):
+    """The archive member of the worksheet named @sheet (the first worksheet if None)."""
+    sheets = _sheets(archive)
+    targets = dict((rel.get('Id'), rel.get('Target'))
+                   for rel in ET.fromstring(archive.read('xl/_rels/workbook.xml.rels')).iter(PACKAGE_REL_NS + 'Relationship'))
+    for name, rel_id in sheets:
+        if sheet is None or name == sheet:
+            target = targets[rel_id]
+            return target.lstrip('/') if target.startswith('/') else 'xl/' + target
+    raise ValueError("no sheet named {} (sheets: {})".format(sheet, ', '.join(name for name, _ in sheets)))
+
+
+def _cell_value(cell, strings):
+    kind = cell.get('t', 'n')
+    if kind == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(MAIN_NS + 't'))
+    value = cell.find(MAIN_NS + 'v')
+    if value is None or value.text is None:
+        return None
+    if kind == 's':
+        return strings[int(value.text)]
+    if kind == 'n':
+        return float(value.text)
+    if kind == 'b':
+        return value.text == '1'
+    # formula strings ('str') and errors ('e')
+    return value.text
+
+
+def iter_rows(filepath, sheet=None):
+    """
+    Stream the rows of the worksheet @sheet (the first one if None) of the workbook @filepath.
+
+    :return: a generator of (row number, dict that maps the 0-based column index to the cell value) for each
+    non-empty row; values are floats, strings or booleans (formulas give their cached result)
+    """
+    with zipfile.ZipFile(filepath) as archive:
+        strings = _shared_strings(archive)
+        with archive.open(_sheet_member(archive, sheet)) as f:
+            for _, elem in ET.iterparse(f):
+                if elem.tag != MAIN_NS + 'row':
+                    continue
+                cells = dict()
+                for cell in elem.iter(MAIN_NS + 'c'):
+                    value = _cell_value(cell, strings)
+                    if value is not None and value != '':
+                        cells[column_index(CELL_RE.match(cell.get('r')).group(1))] = value
+                if cells:
+                    yield int(elem.get('r')), cells
+                elem.clear()
+
+
+def _number(value, cell, unparsable):
+    if isinstance(value, float):
+        return value
+    if value is None or str(value).strip() in MISSING:
+        return float('nan')
+    try:
+        return float(value)
+    except ValueError:
+        unparsable.append((cell, value))
+        return float('nan')
+
+
+def parse_blocks(rows, unparsable=None):
+    """
+    Find the result blocks in @rows (see iter_rows and the module documentation).
+
+    :param unparsable: if set, a list to which the (cell reference, value) of the text cells of metrics that are
+    not numbers (e.g., a mistyped fold '.7\uf7398') are appended; they are read as NaN
+    :return: a list of blocks in the order of the sheet (top to bottom, then left to right), each a dict of
+    the 'setting' (the value next to the label, or the label itself), its 'label', the 'average' and the
+    per-fold values ('folds') of each metric (by metric_name); missing values are NaN
+    """
+    if unparsable is None:
+        unparsable = []
+    blocks = []
+    setting_row = dict()
+    open_blocks = []
+    previous = dict()
+    last = None
+    for number, cells in rows:
+        if last is not None and number != last + 1:
+            # blocks end at an empty row
+            open_blocks = []
+            previous = dict()
+        last = number
+        averages = [col for col, value in cells.items() if isinstance(value, str) and value.strip() == 'Average']
+        if averages:
+            # a fold header row: each "Average" column ends a block whose folds start after the previous block
+            open_blocks = []
+            setting_row = previous
+            for average in sorted(averages):
+                folds = sorted(col for col, value in cells.items()
+                               if col < average and not isinstance(value, str)
+                               and (not open_blocks or col > open_blocks[-1]['average_column']))
+                first = folds[0] if folds else average
+                label, setting = setting_row.get(first - 1), setting_row.get(first)
+                if setting is None:
+                    # a single label, e.g., "Mean 2.6"
+                    setting, label = label, None
+                elif not isinstance(label, str):
+                    # blocks side by side share the label at the start of the row, e.g., "Mean" 2.8 ... 2.9
+                    label = open_blocks[-1]['label'] if open_blocks else None
+                block = dict(label=label.strip() if label else None, setting=setting, average=dict(), folds=dict(),
+                             fold_columns=folds, average_column=average)
+                open_blocks.append(block)
+                blocks.append(block)
+        elif open_blocks and isinstance(cells.get(0), str):
+            metric = metric_name(cells[0])
+            for block in open_blocks:
+                block['average'][metric] = _number(cells.get(block['average_column']),
+                                                   column_letters(block['average_column']) + str(number), unparsable)
+                block['folds'][metric] = [_number(cells.get(col), column_letters(col) + str(number), unparsable)
+                                          for col in block['fold_columns']]
+        else:
+            open_blocks = []
+        previous = cells
+    for block in blocks:
+        del block['fold_columns']
+        del block['average_column']
+    return blocks
+
+
+def _read_sidecar(sidecar_path):
+    try:
+        with open(sidecar_path, 'r') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def load_blocks(filepath, sheet=None):
+    """
+    The result blocks (see parse_blocks) of the worksheet @sheet of the workbook @filepath, from the sidecar
+    cache when it is fresh. Metric cells that are not numbers are read as NaN, with a warning (on every load,
+    cached or not) that gives their sheet and cell reference.
+    """
+    memo_key = (os.path.abspath(filepath), sheet)
+    if memo_key in _loaded:
+        return _loaded[memo_key]
+    sidecar_path = filepath + SIDECAR_SUFFIX
+    stat = os.stat(filepath)
+    cached = _read_sidecar(sidecar_path)
+    sheet_key = sheet or ''
+    blocks = None
+    if cached is not None and cached.get('size') == stat.st_size and sheet_key in cached.get('sheets', dict()):
+        if cached.get('mtime') == stat.st_mtime_ns or cached.get('sha1') == series_cache.file_hash(filepath):
+            blocks = cached['sheets'][sheet_key]
+            unparsable = cached.get('unparsable', dict()).get(sheet_key, [])
+    if blocks is None:
+        unparsable = []
+        blocks = parse_blocks(iter_rows(filepath, sheet), unparsable)
+        if unparsable:
+            unparsable = [(sheet or sheet_names(filepath)[0], cell, value) for cell, value in unparsable]
+        digest = series_cache.file_hash(filepath)
+        if cached is None or cached.get('sha1') != digest:
+            cached = dict(sheets=dict())
+        cached.update(mtime=stat.st_mtime_ns, size=stat.st_size, sha1=digest)
+        cached['sheets'][sheet_key] = blocks
+        cached.setdefault('unparsable', dict())[sheet_key] = unparsable
+        try:
+            series_cache.write_atomic(sidecar_path, lambda f: f.write(json.dumps(cached).encode('utf-8')))
+        except (IOError, OSError):
+            # read-only data folder: still works, only without the cache
+            pass
+    if unparsable:
+        warnings.warn("{}: read {} cell(s) that are not numbers as NaN: {}".format(
+            filepath, len(unparsable), ', '.join("{}!{} {!r}".format(name, cell, value) for name, cell, value in unparsable)))
+    _loaded[memo_key] = blocks
+    return blocks
+
+
+def load_metric(filepath, metric, sheet=None, missing=0.0, sort=True):
+    """
+    The average @metric (e.g., 'accuracy' or 'f_score', see metric_name) of every block of a workbook, as a float array.
+
+    :param missing: the value of missing results (N/A); NaN to keep them as such
+    :param sort: order the blocks of each label (e.g., 'Mean' and 'Max') by setting when all settings are numbers
+    (otherwise they are in sheet order); labels keep the order of the sheet
+    """
+    blocks = [block for block in load_blocks(filepath, sheet) if metric in block['average']]
+    if sort and all(isinstance(block['setting'], float) for block in blocks):
+        labels = []
+        for block in blocks:
+            if block['label'] not in labels:
+                labels.append(block['label'])
+        blocks = sorted(blocks, key=lambda block: (labels.index(block['label']), block['setting']))
+    values = np.array([block['average'][metric] for block in blocks], dtype=np.float64)
+    if missing == missing:
+        values[np.isnan(values)] = missing
+    return values
+
+
+def split_source(source):
+    """Split an input reference `<workbook>.xlsx#<metric>` or `<workbook>.xlsx#<sheet>#<metric>` into (path, sheet, metric); (source, None, None) for any other file."""
+    path, _, rest = source.partition('#')
+    if not rest or not path.endswith('.xlsx'):
+        return source, None, None
+    sheet, _, metric = rest.rpartition('#')
+    return path, sheet or None, metric
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Print the result blocks of experiment workbooks.')
+    parser.add_argument('-i', '--input', help='workbook file path(s)', nargs='+', required=True)
+    parser.add_argument('-s', '--sheet', help='worksheet name (default: the first one)')
+    parser.add_argument('-m', '--metric', help='only print this metric, one value per line, like the param_*_<metric>.txt files')
+    args = parser.parse_args()
+
+    for filepath in args.input:
+        if args.metric:
+            for value in load_metric(filepath, metric_name(args.metric), args.sheet).tolist():
+                print(value)
+            continue
+        print(filepath)
+        for block in load_blocks(filepath, args.sheet):
+            name = '{} {}'.format(block['label'], block['setting']) if block['label'] else block['setting']
+            print('  {:<16} {}'.format(name, '  '.join('{}={:.4f}'.format(k, v) for k, v in sorted(block['average'].items()))))
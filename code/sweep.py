@@ -0,0 +1,119 @@
+"""Discover and aggregate the results of a parameter sweep.
+
+Unicorn experiment files carry their parameters in their names, e.g., `stats-s-2000-h-3-w-450-i-10000.csv`
+(sketch size, hop count, window/interval and batch size) or `results-r-0.1.txt` (decay rate). This module
+finds such files, parses their parameters, picks the best threshold of every stats file (prepare.best_results)
+in parallel, and writes the results either as one tidy table or as the per-metric files plot_hist reads.
+"""
+import os
+import re
+import csv
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import prepare
+
+PARAM_RE = re.compile(r'(?:^|-)([a-z])-(\d+(?:\.\d+)?)(?=-|$)')
+
+METRICS = ('f_measure', 'precision', 'recall', 'accuracy')
+# Names used by the per-metric files, e.g., sketch-f-measure-perf.txt
+METRIC_NAMES = dict(f_measure='f-measure', precision='precision', recall='recall', accuracy='accuracy')
+
+
+def parse_params(filepath):
+    """
+    Parse the parameters in the name of @filepath, e.g., {'s': 2000, 'h': 3, 'w': 450, 'i': 10000} for
+    `stats-s-2000-h-3-w-450-i-10000.csv`. Values are ints when possible.
+    """
+    name = os.path.basename(filepath)
+    for ext in ('.csv', '.txt'):
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    params = dict()
+    for key, value in PARAM_RE.findall(name):
+        params[key] = float(value) if '.' in value else int(value)
+    return params
+
+
+def discover(folder, pattern='stats-*.csv'):
+    """
+    Find the files matching @pattern in @folder.
+
+    :return: a list of (params, filepath), sorted by parameters
+    """
+    runs = [(parse_params(fp), fp) for fp in glob.glob(os.path.join(folder, pattern))]
+    return sorted(runs, key=lambda run: sorted(run[0].items()))
+
+
+def group_by(runs, axis):
+    """
+    Group @runs (params, value) along @axis: runs whose other parameters are all equal end up in the same group.
+
+    :return: a dict that maps the other parameters (a sorted tuple of (key, value)) to the runs of the group sorted by @axis
+    """
+    groups = dict()
+    for params, value in runs:
+        if axis not in params:
+            continue
+        fixed = tuple(sorted((k, v) for k, v in params.items() if k != axis))
+        groups.setdefault(fixed, []).append((params, value))
+    for members in groups.values():
+        members.sort(key=lambda run: run[0][axis])
+    return groups
+
+
+def _chunks(items, n):
+    size = max(1, -(-len(items) // n))
+    return [items[pos:pos + size] for pos in range(0, len(items), size)]
+
+
+def evaluate(runs, jobs=None):
+    """
+    Pick the best threshold of every stats file in @runs (params, filepath) using @jobs worker processes
+    (one per core by default). Each worker handles a share of the files with a single prepare.best_results_batch call.
+
+    :return: a list of (params, result) where result is a dict of the best f_measure, precision, recall, accuracy, metric and std
+    """
+    filepaths = [fp for _, fp in runs]
+    if jobs == 1 or len(filepaths) <= 1:
+        best = prepare.best_results_batch(filepaths)
+    else:
+        jobs = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            best = [r for results in pool.map(prepare.best_results_batch, _chunks(filepaths, jobs * 4)) for r in results]
+    keys = METRICS + ('metric', 'std')
+    return [(params, dict(zip(keys, result))) for (params, _), result in zip(runs, best)]
+
+
+def write_table(results, filepath):
+    """Write @results (see evaluate) to the CSV file @filepath, one row per run: its parameters, then its best rates."""
+    param_keys = sorted(set(k for params, _ in results for k in params))
+    with open(filepath, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(param_keys + list(METRICS) + ['metric', 'std'])
+        writer.writerows([params.get(k) for k in param_keys] + [result[k] for k in METRICS + ('metric', 'std')]
+                         for params, result in results)
+
+
+def write_metric_files(results, axis, baseline, filepath_format, mode='a+'):
+    """
+    Write one file per metric (@filepath_format formatted with the metric name, e.g., `../data/sketch-{}-perf.txt`)
+    with the best rate of each run along @axis whose other parameters equal those of @baseline, in increasing @axis order.
+    """
+    fixed = tuple(sorted((k, v) for k, v in baseline.items() if k != axis))
+    members = group_by(results, axis).get(fixed, [])
+    for metric in METRICS:
+        with open(filepath_format.format(METRIC_NAMES[metric]), mode) as f:
+            f.write(''.join(str(result[metric]) + '\n' for _, result in members))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Pick the best threshold of every stats file of a parameter sweep.')
+    parser.add_argument('-d', '--dir', help='folder that contains the stats files', required=True)
+    parser.add_argument('-p', '--pattern', help='file name pattern of the stats files', default='stats-*.csv')
+    parser.add_argument('-j', '--jobs', help='number of worker processes (default: number of cores)', type=int)
+    parser.add_argument('-o', '--output', help='output CSV file path of the tidy table', required=True)
+    args = parser.parse_args()
+
+    write_table(evaluate(discover(args.dir, args.pattern), args.jobs), args.output)
@@ -0,0 +1,165 @@
+"""A single entry point for preparing the experiment data and rendering the figures, e.g.,
+
+python unicorn_plot.py prepare cpu-mem -i ps.txt --mem mem.txt --cpu cpu.txt
+python unicorn_plot.py prepare camflow-perf -i ts.txt -o ts-clean.txt
+python unicorn_plot.py prepare best -d ../data/param_sketch_camflow_subset
+python unicorn_plot.py prepare degrees -i ../data/degrees -o degrees.csv --max-degree 1000
+python unicorn_plot.py render -j 4 -i
+python unicorn_plot.py --profile profile.csv render
+python unicorn_plot.py check ../old_data ../data
+
+Only the standard library is imported up front. Each subcommand imports what it needs (NumPy, matplotlib) when
+it runs, so that the commands that only parse text (prepare cpu-mem) start about as fast as the interpreter itself:
+an experiment harness may run them thousands of times per sweep.
+"""
+import os
+import sys
+import argparse
+import importlib.util
+
+
+def load_script(name):
+    """Import the script code/@name.py, whose file name need not be a valid module name (e.g., prepare-camflow-perf)."""
+    module_name = name.replace('-', '_')
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(os.path.dirname(os.path.abspath(__file__)), name + '.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+    return sys.modules[module_name]
+
+
+def prepare_cpu_mem(args):
+    # the same series as prepare-cpu-mem.py (or prepare-cpu-mem-highest.py with --highest)
+    import ps_log
+    snapshots = ps_log.decode(args.input, args.cores)
+    ps_log.write_series(args.mem, snapshots.mem_mb(args.mem_total))
+    ps_log.write_series(args.cpu, ps_log.lagged(snapshots.highest() if args.highest else snapshots.average()))
+
+
+def prepare_camflow_perf(args):
+    camflow_perf = load_script('prepare-camflow-perf')
+    if len(args.input) == 1 and not os.path.isdir(args.output):
+        camflow_perf.clean_up(args.input[0], args.output)
+        return
+    report = camflow_perf.clean_up_batch(camflow_perf.batch_pairs(args.input, args.output))
+    for dirty in report:
+        print("{}:{}: {!r}".format(*dirty))
+
+
+def prepare_best(args):
+    import prepare
+    if args.output is None:
+        for folder in args.dir:
+            prepare.prepare_sweeps(folder, args.jobs)
+        return
+    import sweep
+    runs = [run for folder in args.dir for run in sweep.discover(folder, args.pattern)]
+    sweep.write_table(sweep.evaluate(runs, args.jobs), args.output)
+
+
+def prepare_degrees(args):
+    import plot_degree_dist
+    bins = plot_degree_dist.DegreeHistogram.log if args.log_bins else plot_degree_dist.DegreeHistogram.linear
+    hist = plot_degree_dist.histogram_degrees(args.input, bins(args.max_degree, args.bins).edges, args.jobs)
+    plot_degree_dist.write_histogram(hist, args.output)
+
+
+def render_figures(args):
+    import render
+    figures = render.load_manifest(args.manifest)
+    if args.figures:
+        figures = [figure for figure in figures if figure['name'] in args.figures]
+        if not figures:
+            sys.exit("No figure named {} in {}".format(', '.join(args.figures), args.manifest))
+    stamps = render.StampDB(render.stamps_path(args.manifest)) if args.incremental else None
+    for output in render.render_all(figures, args.jobs, stamps):
+        print(output)
+
+
+def add_check_arguments(parser):
+    """Add the arguments of the regression check (see regress.check) to the argparse @parser."""
+    parser.add_argument('old', help='baseline data tree, e.g., ../old_data')
+    parser.add_argument('new', help='new data tree, e.g., ../data')
+    parser.add_argument('-t', '--threshold', help='relative change of the mean beyond which a run may have regressed (default: 0.05)', type=float, default=0.05)
+    parser.add_argument('-a', '--alpha', help='significance level of the Mann-Whitney U test (default: 0.01)', type=float, default=0.01)
+    parser.add_argument('-x', '--exclude', help='file name globs of runs to leave out, e.g., perf-extended-*', nargs='+', default=[])
+    parser.add_argument('--ignore', help='parameters left out when matching runs, e.g., i to compare runs of different batch sizes, or workload to compare runs of different workloads', nargs='+', default=[])
+    parser.add_argument('-o', '--output', help='also write the report to this JSON or CSV file')
+
+
+def check_regressions(args):
+    import regress
+    status = regress.check(args)
+    if status:
+        sys.exit(status)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='unicorn_plot.py', description='Prepare the Unicorn experiment data and render the figures.')
+    parser.add_argument('--profile', help='record the cost of each stage of the command to this JSON or CSV file (see profiling); runs in a single process')
+    parser.add_argument('--cprofile', help='also dump cProfile statistics of the command to this file')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    prepare = commands.add_parser('prepare', help='turn raw experiment output into plottable data').add_subparsers(dest='what', metavar='what')
+    prepare.required = True
+
+    cpu_mem = prepare.add_parser('cpu-mem', help='split a ps log into CPU and memory series (see ps_log)')
+    cpu_mem.add_argument('-i', '--input', help='input ps log file path', required=True)
+    cpu_mem.add_argument('--mem', help='output file path of the memory usage in MB', required=True)
+    cpu_mem.add_argument('--cpu', help='output file path of the CPU usage', required=True)
+    cpu_mem.add_argument('-c', '--cores', help='number of cores of the machine', type=int, default=8)
+    cpu_mem.add_argument('-m', '--mem-total', help='total memory of the machine in MB', type=float, default=61 * 1024)
+    cpu_mem.add_argument('--highest', help='CPU usage of the busiest core instead of the average over all cores', action='store_true')
+    cpu_mem.set_defaults(func=prepare_cpu_mem)
+
+    camflow_perf = prepare.add_parser('camflow-perf', help='clean up CamFlow timestamp files (see prepare-camflow-perf.py)')
+    camflow_perf.add_argument('-i', '--input', help='input data file path(s)', nargs='+', required=True)
+    camflow_perf.add_argument('-o', '--output', help='output data file path (a folder if there are multiple input files)', required=True)
+    camflow_perf.set_defaults(func=prepare_camflow_perf)
+
+    best = prepare.add_parser('best', help='pick the best threshold of every stats CSV file of a sweep (see sweep)')
+    best.add_argument('-d', '--dir', help='sweep folder(s)', nargs='+', default=['../data'])
+    best.add_argument('-p', '--pattern', help='stats file name pattern', default='stats-*.csv')
+    best.add_argument('-j', '--jobs', help='number of worker processes (default: number of cores)', type=int)
+    best.add_argument('-o', '--output', help='output CSV table (default: write the per-metric files in each folder, like prepare.py)')
+    best.set_defaults(func=prepare_best)
+
+    degrees = prepare.add_parser('degrees', help='count the degrees of graphs into a histogram CSV (see plot_degree_dist)')
+    degrees.add_argument('-i', '--input', help='input data folder(s); the degrees of several graphs are merged', nargs='+', required=True)
+    degrees.add_argument('-o', '--output', help='output CSV file path', required=True)
+    degrees.add_argument('--max-degree', help='upper end of the bins; larger degrees are counted in a last row', type=int, required=True)
+    degrees.add_argument('-b', '--bins', help='number of bins', type=int, default=20)
+    degrees.add_argument('--log-bins', help='use log-spaced bins', action='store_true')
+    degrees.add_argument('-j', '--jobs', help='number of worker processes (default: number of cores)', type=int)
+    degrees.set_defaults(func=prepare_degrees)
+
+    figures = commands.add_parser('render', help='render the figures of a manifest (see render)')
+    figures.add_argument('-m', '--manifest', help='manifest file path', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'figures.json'))
+    figures.add_argument('-j', '--jobs', help='number of worker processes (default: number of cores)', type=int)
+    figures.add_argument('-i', '--incremental', help='only render figures whose inputs or parameters changed', action='store_true')
+    figures.add_argument('figures', help='names of the figures to render (default: all)', nargs='*')
+    figures.set_defaults(func=render_figures)
+
+    check = commands.add_parser('check', help='fail if the runs of a new data tree are slower or heavier than those of a baseline (see regress)')
+    add_check_arguments(check)
+    check.set_defaults(func=check_regressions)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.profile and not args.cprofile:
+        args.func(args)
+        return
+    import profiling
+    if hasattr(args, 'jobs'):
+        # stages are only recorded in this process
+        args.jobs = 1
+    with profiling.profiled(args.profile, args.cprofile):
+        args.func(args)
+
+
+if __name__ == "__main__":
+    main()